@@ -8,6 +8,22 @@ CONTEST_PAGE_DIR = os.path.join(CONTEST_DIR, 'pages')
 CONTEST_RESULT_DIR = os.path.join(CONTEST_DIR, 'results')
 
 
+# The most a draftkings lineup is allowed to cost
+SALARY_CAP = 50000
+
+# The slots of a draftkings lineup and the positions that are eligible for each one (None for any position)
+ROSTER_SLOTS = (
+    ('pg', {'PG'}),
+    ('sg', {'SG'}),
+    ('sf', {'SF'}),
+    ('pf', {'PF'}),
+    ('c', {'C'}),
+    ('g', {'G', 'PG', 'SG'}),
+    ('f', {'F', 'PF', 'SF'}),
+    ('util', None),
+)
+
+
 # Map 3rd party team abbreviations to names used in the database
 TEAM_MAP = {
     'NY': 'NYK',
@@ -0,0 +1,108 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from texttable import Texttable
+
+from basketball.utils.benchmark import benchmark
+from basketball.utils.engines import ENGINES
+
+
+class Command(BaseCommand):
+
+    help = 'Benchmarks the lineup optimizers on synthetic slates.'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            '-e', '--engines',
+            action='store',
+            nargs='+',
+            choices=sorted(ENGINES.keys()),
+            default=['ga', 'milp', 'vector'],
+            help='The optimizers to benchmark.')
+        parser.add_argument(
+            '-p', '--players',
+            action='store',
+            nargs='+',
+            type=int,
+            default=[150],
+            help='The number of players of each synthetic slate.')
+        parser.add_argument(
+            '--seeds',
+            action='store',
+            type=int,
+            default=3,
+            help='The number of slates (and seeds) of each size.')
+        parser.add_argument(
+            '-n', '--generations',
+            action='store',
+            nargs='+',
+            type=int,
+            default=[10000],
+            help='The number of generations of each configuration.')
+        parser.add_argument(
+            '--n-children',
+            action='store',
+            nargs='+',
+            type=int,
+            default=[4],
+            help='The number of children of each configuration.')
+        parser.add_argument(
+            '--n-best',
+            action='store',
+            type=int,
+            default=5,
+            help='The number of lineups each optimizer keeps.')
+        parser.add_argument(
+            '--checkpoints',
+            action='store',
+            type=int,
+            default=10,
+            help='The number of times the best fitness is recorded during each run.')
+        parser.add_argument(
+            '-o', '--output',
+            action='store',
+            type=str,
+            default='benchmark.jsonl',
+            help='The JSON lines file the results are appended to.')
+        parser.add_argument(
+            '--label',
+            action='store',
+            type=str,
+            help='Recorded with every result, e.g. the version being benchmarked.')
+
+    def handle(self, *args, **options):
+
+        configs = [
+            (n, options.get('n_best'), n_children)
+            for n in options.get('generations')
+            for n_children in options.get('n_children')]
+
+        results = benchmark(
+            options.get('output'),
+            options.get('engines'),
+            slate_sizes=options.get('players'),
+            seeds=range(options.get('seeds')),
+            configs=configs,
+            checkpoints=options.get('checkpoints'),
+            label=options.get('label'))
+
+        # Average the last checkpoint of every run over the seeds
+        runs = defaultdict(list)
+        for result in results:
+            if result['final']:
+                runs[(result['engine'], result['n_players'], result['n'], result['n_children'])].append(result)
+
+        table = Texttable(max_width=120)
+        table.set_deco(Texttable.HEADER)
+        table.add_row(['engine', 'players', 'n', 'children', 'best', 'gap', 'seconds', 'evaluations/s'])
+        for key in sorted(runs.keys()):
+            records = runs[key]
+            table.add_row(list(key) + [
+                sum(r['best_fitness'] for r in records) / len(records),
+                sum(r['gap'] for r in records) / len(records),
+                sum(r['elapsed'] for r in records) / len(records),
+                int(sum(r['evaluations_per_second'] for r in records) / len(records)),
+            ])
+        print(table.draw())
+        print('Results appended to {}'.format(options.get('output')))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from basketball.models import GameLog, TeamGameSummary
+from basketball.utils.scoring import recompute, scoring_version
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Scores the game logs and stores their draftking points, '
+        'only the ones scored with a different scoring table by default, then rebuilds the team box scores.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-a', '--all',
+            action='store_true',
+            help='Re-score every game log.')
+
+    def handle(self, *args, **options):
+
+        print('Scoring game logs with scoring version {}.'.format(scoring_version()))
+        scored = recompute(GameLog.objects.all(), everything=options.get('all'))
+        print('Done, {} game logs scored.'.format(scored))
+        # The game logs may have been loaded (e.g. with loaddata) without their box scores
+        print('{} team box scores rebuilt.'.format(TeamGameSummary.objects.rebuild()))
@@ -4,46 +4,17 @@ from datetime import timedelta
 
 from django.core.management.base import BaseCommand
 
-from basketball.models import Season, GameLog, Game
+from basketball.models import Season, GameLog, TeamGameSummary
 import numpy as np
 # import matplotlib.cm as cm
 
 from basketball.utils.ann import NeuralNet
 from basketball.utils.dk_tools.salaries import SalaryFileManager
+from basketball.utils.scoring import score_queryset
 
 
 def draw_teams_for_vs_against():
-    myd = {}
-
-    games = Game.objects.filter(season=Season.objects.get(name='16'))
-
-    for game in games:
-        gls_home = GameLog.objects.filter(game=game, team=game.home_team)
-        gls_away = GameLog.objects.filter(game=game, team=game.away_team)
-
-        home = str(game.home_team)
-        away = str(game.away_team)
-
-        pts_home = sum(_.draft_king_points for _ in gls_home)
-        pts_away = sum(_.draft_king_points for _ in gls_away)
-
-        if home in myd:
-            myd[home]['scored'].append(pts_home)
-            myd[home]['lost'].append(pts_away)
-        else:
-            myd[home] = {
-                'scored': [pts_home],
-                'lost': [pts_away]
-            }
-
-        if away in myd:
-            myd[away]['scored'].append(pts_away)
-            myd[away]['lost'].append(pts_home)
-        else:
-            myd[home] = {
-                'scored': [pts_away],
-                'lost': [pts_home]
-            }
+    myd = TeamGameSummary.objects.dk_points_by_team(Season.objects.get(name='16'))
 
     for k, v in myd.items():
         scored = sum(myd[k]['scored']) / len(myd[k]['scored'])
@@ -73,37 +44,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         # draw_teams_for_vs_against()
 
-        myd = {}
-
-        games = Game.objects.filter(season=Season.objects.get(name='16'))
-
-        for game in games:
-            gls_home = GameLog.objects.filter(game=game, team=game.home_team)
-            gls_away = GameLog.objects.filter(game=game, team=game.away_team)
-
-            home = str(game.home_team)
-            away = str(game.away_team)
-
-            pts_home = sum(_.draft_king_points for _ in gls_home)
-            pts_away = sum(_.draft_king_points for _ in gls_away)
-
-            if home in myd:
-                myd[home]['scored'].append(pts_home)
-                myd[home]['lost'].append(pts_away)
-            else:
-                myd[home] = {
-                    'scored': [pts_home],
-                    'lost': [pts_away]
-                }
-
-            if away in myd:
-                myd[away]['scored'].append(pts_away)
-                myd[away]['lost'].append(pts_home)
-            else:
-                myd[home] = {
-                    'scored': [pts_away],
-                    'lost': [pts_home]
-                }
+        myd = TeamGameSummary.objects.dk_points_by_team(Season.objects.get(name='16'))
         for k, v in myd.items():
             scored = sum(myd[k]['scored']) / len(myd[k]['scored'])
             lost = sum(myd[k]['lost']) / len(myd[k]['lost'])
@@ -128,7 +69,8 @@ class Command(BaseCommand):
         def adjust_lost(val):
             return (val - min_lost) / float(max_lost - min_lost) * 0.999 + 0.0001
 
-        max_ppm = max(gl.draft_king_points for gl in GameLog.objects.filter(game__season=Season.objects.get(name='16')))
+        max_ppm = float(score_queryset(
+            GameLog.objects.filter(game__season=Season.objects.get(name='16')))['draft_king_points'].max())
 
         def adjust_ppm(val):
             return val / float(max_ppm) * 0.999 + 0.0001
@@ -1,33 +1,31 @@
 import logging as log
 from collections import Counter
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from texttable import Texttable
 
 from basketball.constants import TEAM_MAP
-from basketball.models import Season, GameLog, Game, Team
+from basketball.models import Season, GameLog, Player, Team, TeamGameSummary
 from basketball.utils.dk_tools.salaries import SalaryFileManager
-from basketball.utils.evolution import Evolve
+from basketball.utils.engines import CACHED_ENGINES, ENGINES
+from basketball.utils.evolution import StopCriteria, optimality_gap
+from basketball.utils.fitness import CovarianceScorer
+from basketball.utils.instrumentation import MetricsWriter
+from basketball.utils.local_search import HillClimber
+from basketball.utils.pareto import OBJECTIVES, ParetoEvolve
+from basketball.utils.pool import map_players_to_positions
+from basketball.utils.portfolio import Portfolio
+from basketball.utils.pruning import count_combinations, prune_dominated
 from basketball.utils.roto.starters import StartersFileManager
+from basketball.utils.simulation import OutcomeSimulator
 from basketball.utils.statistics import PRManager, PRange
+from basketball.utils.warm_start import load_lineups, save_lineups
 
 
-def map_players_to_positions(players):
-    return {
-        'pg': filter(lambda k: 'PG' in k.position, players),
-        'sg': filter(lambda k: 'SG' in k.position, players),
-        'sf': filter(lambda k: 'SF' in k.position, players),
-        'pf': filter(lambda k: 'PF' in k.position, players),
-        'c': filter(lambda k: 'C' in k.position, players),
-        'g': filter(lambda k: k.position & {'G', 'PG', 'SG'}, players),
-        'f': filter(lambda k: k.position & {'F', 'PF', 'SF'}, players),
-        'util': filter(lambda k: k, players)}
-
-
-def assign_minutes(players, game_logs):
+def assign_minutes(players, averages):
 
     for player in players:
-        avg_mins = player.average_minutes(game_logs=game_logs)
+        avg_mins = averages[player.pk][1]
         player.expected_minutes = avg_mins
 
         if hasattr(player, 'starting'):
@@ -43,45 +41,15 @@ def assign_minutes(players, game_logs):
                     print('"{}" is not starting. He averages {} minutes of playtime, settings to 20 mins.'.format(player.name, avg_mins))
 
 
-def assign_points(players, game_logs):
+def assign_points(players, averages):
 
     for player in players:
-        avg_ppm = player.average_ppm(game_logs=game_logs)
+        avg_ppm = averages[player.pk][2]
         player.expected_points = avg_ppm * player.expected_minutes
 
 
 def adjust_points(players):
-    myd = {}
-
-    games = Game.objects.filter(season=Season.objects.get(name='16'))
-
-    for game in games:
-        gls_home = GameLog.objects.filter(game=game, team=game.home_team)
-        gls_away = GameLog.objects.filter(game=game, team=game.away_team)
-
-        home = str(game.home_team)
-        away = str(game.away_team)
-
-        pts_home = sum(_.draft_king_points for _ in gls_home)
-        pts_away = sum(_.draft_king_points for _ in gls_away)
-
-        if home in myd:
-            myd[home]['scored'].append(pts_home)
-            myd[home]['lost'].append(pts_away)
-        else:
-            myd[home] = {
-                'scored': [pts_home],
-                'lost': [pts_away]
-            }
-
-        if away in myd:
-            myd[away]['scored'].append(pts_away)
-            myd[away]['lost'].append(pts_home)
-        else:
-            myd[home] = {
-                'scored': [pts_away],
-                'lost': [pts_home]
-            }
+    myd = TeamGameSummary.objects.dk_points_by_team(Season.objects.get(name='16'))
     avg = 0
     for k, v in myd.items():
         scored = sum(myd[k]['scored']) / len(myd[k]['scored'])
@@ -107,12 +75,11 @@ def adjust_points(players):
     # print(myd)
 
 
-def extra_filters(players, game_logs):
+def extra_filters(players, averages):
 
     players_to_remove = set()
     for player in players:
-        avg_mins = player.average_minutes(game_logs=game_logs)
-        avg_ppm = player.average_ppm(game_logs=game_logs)
+        _, avg_mins, avg_ppm = averages[player.pk]
 
         if player.salary < 3600:
             players_to_remove.add(player)
@@ -149,6 +116,116 @@ class Command(BaseCommand):
             action='store',
             type=int,
             help='Generate lineups using the specified salary file.')
+        parser.add_argument(
+            '-e', '--engine',
+            action='store',
+            choices=sorted(ENGINES.keys()),
+            default='ga',
+            help='The optimizer used to generate the lineups.')
+        parser.add_argument(
+            '--islands',
+            action='store',
+            type=int,
+            help='The number of populations (and processes) used by the "islands" engine, defaults to the cpu count.')
+        parser.add_argument(
+            '--cache-size',
+            action='store',
+            type=int,
+            help='Remember the fitness level of this many lineups so the same players are only scored once. '
+                 'Only worth it with --ceiling or --variance-weight, and only used by the engines that score '
+                 'one lineup at a time (%s).' % ', '.join(CACHED_ENGINES))
+        parser.add_argument(
+            '--patience',
+            action='store',
+            type=int,
+            help='Stop once the best lineups have not improved for this many steps of the engine: generations '
+                 'of 4 children (ga), generations of the whole population (vector, pareto), migration rounds of '
+                 '50 generations (islands), rounds of 100 swaps (annealing), climbs (hill) or swaps (tabu). '
+                 'The milp engine always finds the best lineups and ignores the stop options.')
+        parser.add_argument(
+            '--time-budget',
+            action='store',
+            type=float,
+            help='Stop generating lineups after this many seconds.')
+        parser.add_argument(
+            '--target',
+            action='store',
+            type=float,
+            help='Stop once the best lineup is expected to score at least this many points.')
+        parser.add_argument(
+            '--epsilon',
+            action='store',
+            type=float,
+            help='Stop once the best lineup is within this fraction (e.g. 0.01) of the LP relaxation upper bound.')
+        parser.add_argument(
+            '--portfolio',
+            action='store',
+            type=int,
+            help='Generate this many diverse lineups (for multi-entry contests) instead of the 5 best.')
+        parser.add_argument(
+            '--max-exposure',
+            action='store',
+            type=float,
+            default=1.0,
+            help='With --portfolio, the largest fraction of the lineups a single player can be in.')
+        parser.add_argument(
+            '--min-unique',
+            action='store',
+            type=int,
+            default=1,
+            help='With --portfolio, the minimum number of players any two lineups must not share.')
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Remove the players that are dominated in a roster slot (by enough players that cost at most '
+                 'as much and are expected to score more) before generating the lineups. '
+                 'Not used with --ceiling, --variance-weight, --engine pareto or --portfolio.')
+        parser.add_argument(
+            '--ceiling',
+            action='store',
+            type=float,
+            default=0.0,
+            help='Score lineups by their expected points plus this many standard deviations of their points, '
+                 'using the covariance of the players\' draftking points (e.g. 1.28 for the 90th percentile).')
+        parser.add_argument(
+            '--variance-weight',
+            action='store',
+            type=float,
+            default=0.0,
+            help='Score lineups by their expected points minus this times the variance of their points.')
+        parser.add_argument(
+            '--polish',
+            action='store_true',
+            help='Improve the best lineups with 1 and 2 player swaps until no swap improves them '
+                 '(not used with --portfolio).')
+        parser.add_argument(
+            '--metrics',
+            action='store',
+            type=str,
+            help='Write the metrics of the generations (fitness, evaluations per second, timings...) '
+                 'to this file as JSON lines.')
+        parser.add_argument(
+            '--metrics-every',
+            action='store',
+            type=int,
+            default=100,
+            help='With --metrics, only write the metrics of every nth generation.')
+        parser.add_argument(
+            '--save-state',
+            action='store',
+            type=str,
+            help='Save the best lineups to this file, so they can be used with --warm-start.')
+        parser.add_argument(
+            '--warm-start',
+            action='store',
+            type=str,
+            help='Continue from the lineups saved with --save-state, '
+                 'replacing the players that are no longer in the pool (e.g. late scratches).')
+        parser.add_argument(
+            '--simulate',
+            action='store',
+            type=int,
+            help='Simulate this many outcomes of every player and rank the lineups by their simulated scores.')
         parser.add_argument(
             '--make-csv',
             action='store',
@@ -188,10 +265,11 @@ class Command(BaseCommand):
                 game__season=Season.objects.get(name='16'),
                 game__date__lt=date)
 
-            assign_minutes(players, game_logs)
-            assign_points(players, game_logs)
+            averages = Player.averages_for(players, game_logs)
+            assign_minutes(players, averages)
+            assign_points(players, averages)
 
-            extra_filters(players, game_logs)
+            extra_filters(players, averages)
 
             # adjust_points(players)
 
@@ -202,18 +280,126 @@ class Command(BaseCommand):
             positioned_players = map_players_to_positions(players)
 
             # Print some initialization information
-            possible_lineups = 1
-            for p in positioned_players.values():
-                possible_lineups *= len(p)
-            print('Generating lineups, about {} possible combinations.'.format(
-                possible_lineups if possible_lineups > 1 else 0))
+            possible_lineups = count_combinations(positioned_players)
+            covariance_fitness = bool(options.get('ceiling') or options.get('variance_weight'))
+            # A dominated player can still have the variance that makes the best lineup, or be needed by the
+            # diverse lineups of a portfolio
+            not_pruned_with = None
+            if covariance_fitness:
+                not_pruned_with = '--ceiling or --variance-weight'
+            elif options.get('engine') == 'pareto':
+                not_pruned_with = '--engine pareto'
+            elif options.get('portfolio'):
+                not_pruned_with = '--portfolio'
+            if options.get('prune') and not_pruned_with:
+                log.warning('--prune only keeps the best lineups for the expected points, '
+                            'not pruning with {}.'.format(not_pruned_with))
+            elif options.get('prune'):
+                positioned_players, removed = prune_dominated(positioned_players)
+                pruned_lineups = count_combinations(positioned_players)
+                message = 'Pruned {} dominated players from their slots, {} possible combinations down to {} ({:.2%}).'
+                print(message.format(
+                    sum(len(players) for players in removed.values()),
+                    possible_lineups, pruned_lineups,
+                    pruned_lineups / float(possible_lineups) if possible_lineups else 0))
+                possible_lineups = pruned_lineups
+            print('Generating lineups, about {} possible combinations.'.format(possible_lineups))
 
             # Generate the lineups and print them
-            evolve = Evolve(positioned_players)
+            engine_options = {}
+            if options.get('engine') == 'islands':
+                engine_options['n_islands'] = options.get('islands')
+            if options.get('cache_size') and options.get('engine') in CACHED_ENGINES:
+                engine_options['cache_size'] = options.get('cache_size')
+            elif options.get('cache_size'):
+                log.warning('--cache-size is not used by the {} engine.'.format(options.get('engine')))
+            evolve = ENGINES[options.get('engine')](positioned_players, **engine_options)
             evolve.date = date
-            evolve.run(70000, n_best=5)
+            if isinstance(evolve, ParetoEvolve):
+                evolve.set_covariance(OutcomeSimulator(evolve.pool.players, game_logs).covariance)
+            if covariance_fitness:
+                covariance = OutcomeSimulator(evolve.pool.players, game_logs).covariance
+                evolve.set_scorer(CovarianceScorer(
+                    evolve.pool, covariance,
+                    ceiling=options.get('ceiling'),
+                    variance_weight=options.get('variance_weight')))
+            metrics = None
+            if options.get('metrics'):
+                metrics = MetricsWriter(options.get('metrics'), every=options.get('metrics_every'))
+                evolve.add_callback(metrics)
+            generations = 70000
+            if options.get('warm_start'):
+                saved = load_lineups(options.get('warm_start'), positioned_players)
+                seeded = evolve.warm_start(saved)
+                changed = sum(1 for lineup in saved for player in lineup.values() if player is None)
+                print('Warm starting from {} of {} saved lineups, {} players replaced.'.format(
+                    len(seeded), len(saved), changed))
+                generations = WARM_START_GENERATIONS
+            if options.get('portfolio'):
+                portfolio = Portfolio(
+                    evolve,
+                    max_exposure=options.get('max_exposure'),
+                    min_distance=options.get('min_unique'))
+                for i, lineup in enumerate(portfolio.generate(options.get('portfolio'))):
+                    print('Lineup {} of {}, {} expected points.'.format(
+                        i + 1, options.get('portfolio'), lineup.expected_points))
+                evolve.best = portfolio.lineups
+            else:
+                if evolve.PATIENCE_UNIT is None:
+                    stopping = [
+                        o for o in ('patience', 'time_budget', 'target', 'epsilon') if options.get(o) is not None]
+                    if stopping:
+                        log.warning('The {} engine does not stop early, ignoring {}.'.format(
+                            options.get('engine'), ', '.join('--' + o.replace('_', '-') for o in stopping)))
+                    print('\n{}.'.format(evolve.run(generations, n_best=5).capitalize()))
+                else:
+                    # Solving the LP relaxation is only worth it to stop early
+                    bound = None
+                    if options.get('epsilon') is not None:
+                        bound = evolve.upper_bound()
+                        if bound is None:
+                            raise CommandError(
+                                '--epsilon needs an upper bound of the expected points, there is none with '
+                                '--ceiling or --variance-weight, or without a legal lineup.')
+                        print('No lineup can be expected to score more than {:.2f} points.'.format(bound))
+                    stop = StopCriteria(
+                        patience=options.get('patience'),
+                        time_budget=options.get('time_budget'),
+                        target=options.get('target'),
+                        epsilon=options.get('epsilon'),
+                        upper_bound=bound)
+                    evolve.run(generations, n_best=5, stop=stop)
+                    print('\nStopped after {} {}, {}.'.format(
+                        stop.generation, evolve.PATIENCE_UNIT, evolve.stop_reason))
+                    gap = optimality_gap(evolve.best[0].fitness_level() if evolve.best else None, bound)
+                    if gap is not None:
+                        print('The best lineup is within {:.2%} of the upper bound.'.format(gap))
+                print('')
+
+                if isinstance(evolve, ParetoEvolve):
+                    print('{} lineups on the pareto front.'.format(len(evolve.front)))
+                    front_table = Texttable(max_width=120)
+                    front_table.set_deco(Texttable.HEADER)
+                    front_table.add_row(['best by'] + list(OBJECTIVES))
+                    for objective in OBJECTIVES:
+                        for lineup in evolve.best_by(objective, 3):
+                            front_table.add_row([objective] + [lineup.objectives[o] for o in OBJECTIVES])
+                    print(front_table.draw() + '\n')
+
+                if options.get('polish'):
+                    before = evolve.best[0].fitness_level()
+                    climber = HillClimber(evolve.gene_pool)
+                    climber.set_scorer(evolve.scorer)
+                    evolve.best = climber.polish_all(evolve.best)
+                    print('Polished the best lineups, the best went from a fitness of {:.2f} to {:.2f}.\n'.format(
+                        before, evolve.best[0].fitness_level()))
+            if metrics is not None:
+                metrics.close()
             print(evolve)
 
+            if options.get('save_state'):
+                save_lineups(options.get('save_state'), evolve.best, date=date)
+
             if options.get('make_csv'):
                 id_file = SalaryFileManager.id_file_for_date(date)
                 id_file.apply_dk_ids(players)
@@ -233,11 +419,12 @@ class Command(BaseCommand):
                         f.write(','.join(out) + '\n')
 
             # Calculate and print the effectiveness of the generated lineups
-            prmanager = PRManager([
+            pranges = [
                 PRange(0, 250),
                 PRange(250, 270),
                 PRange(270, 300),
-                PRange(300)])
+                PRange(300)]
+            prmanager = PRManager(pranges)
             print('Results of top {} lineups with the best at {}pts.'.format(
                 len(evolve.best),
                 max(_.actual for _ in evolve.best)))
@@ -249,6 +436,26 @@ class Command(BaseCommand):
                 results_table.add_row(['{} {}'.format(rg.d1, rg.d2 or '+'), int(rg.probability * 100)])
             print(results_table.draw())
 
+            if options.get('simulate'):
+                simulator = OutcomeSimulator(evolve.pool.players, game_logs, n_draws=options.get('simulate'))
+                summaries = simulator.summarize(evolve.best, pranges)
+
+                print('\nSimulated {} outcomes, lineups ranked by their 90th percentile.'.format(simulator.n_draws))
+                simulation_table = Texttable(max_width=120)
+                simulation_table.set_deco(Texttable.HEADER)
+                simulation_table.add_row(
+                    ['lineup', 'expected', 'mean', 'p10', 'p50', 'p90'] +
+                    ['% {} {}'.format(rg.d1, rg.d2 or '+') for rg in pranges])
+                ranked = sorted(
+                    zip(range(1, len(evolve.best) + 1), evolve.best, summaries),
+                    key=lambda k: k[2]['percentiles'][2],
+                    reverse=True)
+                for i, lineup, summary in ranked:
+                    simulation_table.add_row(
+                        [i, lineup.expected_points, summary['mean']] + summary['percentiles'] +
+                        [int(p * 100) for p in summary['probabilities']])
+                print(simulation_table.draw())
+
             p_dict = Counter()
             for lineup in evolve.best:
                 for player in lineup.genes.values():
@@ -257,6 +464,9 @@ class Command(BaseCommand):
             print(p_dict)
 
 
+# Generations to run when continuing from saved lineups with --warm-start
+WARM_START_GENERATIONS = 5000
+
 INJURED_PLAYERS = set([])
 STARTING_PLAYERS = set([])
 STARTERS_DONT_ADJUST_PLAYTIME = set([])
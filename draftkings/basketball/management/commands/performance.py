@@ -2,7 +2,7 @@
 from django.core.management.base import BaseCommand
 from texttable import Texttable
 
-from basketball.models import GameLog, Season
+from basketball.models import GameLog, Player, Season
 from basketball.utils import db
 from basketball.utils.dk_tools.salaries import SalaryFileManager
 from basketball.utils.elo import NBAManager as ELOManager
@@ -52,11 +52,10 @@ class Command(BaseCommand):
             results_table.set_deco(Texttable.HEADER)
             results_table.add_row(['Player', 'Pos', 'Team', 'Opponent', 'Avg mins', 'Mins', 'Avg pts', 'Pts', 'Starter', 'Diff'])
             results = []
+            averages = Player.averages_for(players, game_logs)
             for player in players:
                 gl = player.gamelog_set.get(game__date=date)
-                avg_pts = player.average_points(game_logs=game_logs)
-                avg_mins = player.average_minutes(game_logs=game_logs)
-                avg_ppm = player.average_ppm(game_logs=game_logs)
+                avg_pts, avg_mins, avg_ppm = averages[player.pk]
                 diff = gl.draft_king_points - avg_ppm * gl.minutes
                 results.append(
                     (' '.join((player.name, str(player.salary))), ', '.join(player.position), gl.team.name, str(gl.game), avg_mins, gl.minutes, avg_pts, gl.draft_king_points, str(player.starting), diff))
@@ -2,7 +2,7 @@
 import gevent
 from gevent import monkey
 
-from basketball.models import Season
+from basketball.models import Season, TeamGameSummary
 
 monkey.patch_socket()
 
@@ -49,6 +49,10 @@ class Command(BaseCommand):
             '-A', '--all',
             action='store_true',
             help='Scrapes everything.')
+        parser.add_argument(
+            '--summaries',
+            action='store_true',
+            help='Rebuilds the team box scores of every game.')
 
     def handle(self, *args, **options):
 
@@ -72,6 +76,12 @@ class Command(BaseCommand):
             for season in Season.objects.all():
                 scrape_by_season(season, options.get('chunks'), options.get('misc'))
 
+        if options.get('summaries'):
+            print('Rebuilding the team box scores.')
+            print('{} team box scores built.'.format(TeamGameSummary.objects.rebuild()))
+        else:
+            print('{} team box scores built for new games.'.format(TeamGameSummary.objects.update_new_games()))
+
 
 def scrape_by_season(season, chunk_size, misc=False):
     all_players = fetch_all_players(season=season)
@@ -96,4 +106,6 @@ def scrape_by_season(season, chunk_size, misc=False):
 
         print('{}%'.format(int(counter / float(number_of_players) * 100.0)))
 
+    # The game logs of games that were already scraped might have changed
+    TeamGameSummary.objects.rebuild(season.games.all())
     print('done.')
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.4 on 2026-10-18 17:45
+from __future__ import unicode_literals
+
+import hashlib
+import json
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Value, When
+
+# A frozen copy of `settings.DRAFT_KING_POINTS` and of `basketball.utils.scoring`, as they were when the columns
+# were added. The `dk_points` command re-scores the game logs when the scoring table changes.
+DRAFT_KING_POINTS = {
+    'free_throws': 1,
+    'twos': 2,
+    'threes': 3.5,
+    'rebounds': 1.25,
+    'assists': 1.5,
+    'steals': 2,
+    'blocks': 2,
+    'turnovers': -0.5,
+    'double_double': 1.5,
+    'triple_double': 3,
+}
+
+CATEGORY_COLUMNS = {
+    'free_throws': ('free_throws_made',),
+    'twos': ('twos_made',),
+    'threes': ('threes_made',),
+    'rebounds': ('offensive_rebounds', 'defensive_rebounds'),
+    'assists': ('assists',),
+    'steals': ('steals',),
+    'blocks': ('blocks',),
+    'turnovers': ('turnovers',),
+}
+
+BONUS_CATEGORIES = ('rebounds', 'steals', 'assists', 'blocks')
+
+STAT_COLUMNS = (
+    'minutes', 'offensive_rebounds', 'defensive_rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+    'free_throws_made', 'twos_made', 'threes_made',
+)
+
+BATCH_SIZE = 900
+
+
+def score(stats):
+    """The draftking points of a dictionary of `STAT_COLUMNS`, like `GameLog.draft_king_points`"""
+    points = 0.0
+    stats_over_10 = 0
+    for name, columns in CATEGORY_COLUMNS.items():
+        value = sum(stats[c] for c in columns)
+        points += value * DRAFT_KING_POINTS[name]
+        if name in BONUS_CATEGORIES and value >= 10:
+            stats_over_10 += 1
+    if stats['twos_made'] * 2 + stats['threes_made'] * 3 + stats['free_throws_made'] >= 10:
+        stats_over_10 += 1
+
+    if stats_over_10 >= 3:
+        points += DRAFT_KING_POINTS['triple_double']
+    if stats_over_10 == 2:
+        points += DRAFT_KING_POINTS['double_double']
+    return points
+
+
+def score_game_logs(apps, schema_editor):
+    GameLog = apps.get_model('basketball', 'GameLog')
+    version = hashlib.sha1(json.dumps(sorted(DRAFT_KING_POINTS.items())).encode('utf-8')).hexdigest()
+
+    by_points = defaultdict(list)
+    for row in GameLog.objects.values_list('pk', *STAT_COLUMNS):
+        by_points[score(dict(zip(STAT_COLUMNS, row[1:])))].append(row[0])
+
+    for value, pks in by_points.items():
+        for start in range(0, len(pks), BATCH_SIZE):
+            GameLog.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).update(
+                dk_points=value,
+                dk_ppm=Case(
+                    When(minutes__gt=0, then=Value(value) / F('minutes')),
+                    default=0.0,
+                    output_field=FloatField()),
+                dk_scoring_version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basketball', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamelog',
+            name='dk_points',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gamelog',
+            name='dk_ppm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gamelog',
+            name='dk_scoring_version',
+            field=models.CharField(blank=True, db_index=True, max_length=40, null=True),
+        ),
+        migrations.RunPython(score_game_logs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.4 on 2026-10-18 17:49
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+import django.db.models.deletion
+
+
+def build_summaries(apps, schema_editor):
+    """A frozen copy of `TeamGameSummary.objects.rebuild()`, as it was when the table was added"""
+    GameLog = apps.get_model('basketball', 'GameLog')
+    TeamGameSummary = apps.get_model('basketball', 'TeamGameSummary')
+
+    totals = GameLog.objects.order_by().values('game', 'team', 'game__home_team', 'game__away_team').annotate(
+        points=Sum(F('twos_made') * 2 + F('threes_made') * 3 + F('free_throws_made')),
+        dk_points=Sum('dk_points'),
+        minutes=Sum('minutes'))
+
+    by_game = defaultdict(dict)
+    for row in totals:
+        by_game[row['game']][row['team']] = row
+
+    summaries = []
+    for game_id, teams in by_game.items():
+        for team_id, row in teams.items():
+            home = team_id == row['game__home_team']
+            opponent_id = row['game__away_team'] if home else row['game__home_team']
+            opponent = teams.get(opponent_id, {})
+            summaries.append(TeamGameSummary(
+                game_id=game_id,
+                team_id=team_id,
+                opponent_id=opponent_id,
+                home=home,
+                points=row['points'] or 0,
+                dk_points=row['dk_points'] or 0.0,
+                minutes=row['minutes'] or 0,
+                opponent_points=opponent.get('points') or 0,
+                opponent_dk_points=opponent.get('dk_points') or 0.0,
+                opponent_minutes=opponent.get('minutes') or 0))
+    TeamGameSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basketball', '0002_gamelog_dk_points'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamGameSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('home', models.BooleanField(default=False)),
+                ('points', models.IntegerField(default=0)),
+                ('dk_points', models.FloatField(default=0)),
+                ('minutes', models.IntegerField(default=0)),
+                ('opponent_points', models.IntegerField(default=0)),
+                ('opponent_dk_points', models.FloatField(default=0)),
+                ('opponent_minutes', models.IntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_summaries', to='basketball.Game')),
+                ('opponent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='basketball.Team')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_summaries', to='basketball.Team')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='teamgamesummary',
+            unique_together=set([('game', 'team')]),
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
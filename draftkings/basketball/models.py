@@ -1,13 +1,16 @@
 from __future__ import unicode_literals
 import itertools
+from collections import defaultdict
 
 from datetime import datetime, timedelta
 import six
 
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
 from django.conf import settings
 
+from basketball.utils.scoring import scoring_version
+
 
 class Season(models.Model):
     name_choices = (
@@ -71,17 +74,29 @@ class Game(models.Model):
             teams='{} v {}'.format(self.home_team, self.away_team),
             date=self.date.date())
 
-    def home_team_score(self):
+    def team_summary(self, team):
+        """The `TeamGameSummary` of one of the teams, or None if it hasn't been built.
+
+        The game's summaries are loaded once (or prefetched with `prefetch_related('team_summaries')`).
+        """
+        if not hasattr(self, '_team_summaries'):
+            self._team_summaries = {s.team_id: s for s in self.team_summaries.all()}
+        return self._team_summaries.get(team.pk if team is not None else None)
+
+    def team_score(self, team):
+        summary = self.team_summary(team)
+        if summary is not None:
+            return summary.points
         game_logs = GameLog.objects.filter(
             game=self,
-            team=self.home_team)
+            team=team)
         return sum(gl.points for gl in game_logs)
 
+    def home_team_score(self):
+        return self.team_score(self.home_team)
+
     def away_team_score(self):
-        game_logs = GameLog.objects.filter(
-            game=self,
-            team=self.away_team)
-        return sum(gl.points for gl in game_logs)
+        return self.team_score(self.away_team)
 
     def winner(self):
         if self.home_team_score() > self.away_team_score():
@@ -134,20 +149,60 @@ class Team(models.Model):
         return GameLog.objects.filter(team=self)
 
     def game_logs_grouped_by_game(self, game_logs=None):
-        games = Game.objects.games_for_team(self)
-        return_value = []
-        for game in games:
-            if game_logs is not None:
-                team_game_logs = game_logs.filter(game=game, team=self)
-            else:
-                team_game_logs = GameLog.objects.filter(game=game, team=self)
+        """The team's game logs grouped by game, a list with a list of game logs for each game, oldest first.
+
+        The game logs (with their game, player and team) are loaded with a single query and grouped in memory.
+        The result is cached on the instance for the last `game_logs`, so `average_points()`,
+        `average_playtime()` and the views share it.
+
+        Args:
+            game_logs: optional queryset of `GameLog`s to group (only the team's are used)
+        """
+        cached = getattr(self, '_grouped_game_logs', None)
+        if cached is not None and cached[0] is game_logs:
+            return cached[1]
 
-            if team_game_logs:
-                return_value.append(team_game_logs)
+        team_game_logs = (game_logs if game_logs is not None else GameLog.objects.all()).filter(team=self)
+        team_game_logs = team_game_logs.select_related(
+            'game__home_team', 'game__away_team', 'player', 'team').order_by('game__date', 'game', 'pk')
+        return_value = [list(logs) for _, logs in itertools.groupby(team_game_logs, key=lambda gl: gl.game_id)]
 
+        self._grouped_game_logs = (game_logs, return_value)
         return return_value
 
 
+# The totals `averages_from_totals()` needs, for `aggregate()` or `annotate()`
+AVERAGE_TOTALS = {
+    'points': Sum('dk_points'),
+    'minutes': Sum('minutes'),
+    'games': Count('pk'),
+    'scored': Count('dk_points'),
+}
+
+
+def averages_from_totals(points, minutes, games, scored):
+    """The average points, minutes and points per minute of some totals (see `AVERAGE_TOTALS`)
+
+    Rounded the same way as the averages of the `Player`, the minutes are averaged with an integer division.
+
+    Args:
+        scored: the number of games with their `dk_points`, the averages need all of them
+
+    Returns:
+        tuple of (average points, average minutes, average points per minute)
+    """
+    if scored != games:
+        raise ValueError(
+            '{} of {} game logs have no draftking points, score them with the dk_points command.'.format(
+                games - scored, games))
+    if not games:
+        return 0, 0, 0
+    avg_points = round((points or 0.0) / games, 2)
+    avg_minutes = round(minutes / games, 2)
+    avg_ppm = round(avg_points / avg_minutes, 2) if avg_minutes and avg_points else 0
+    return avg_points, avg_minutes, avg_ppm
+
+
 class Player(models.Model):
     scrape_id = models.IntegerField(null=True, blank=True, unique=True)
 
@@ -207,39 +262,56 @@ class Player(models.Model):
             q = Q(game__away_team__pk=team) | Q(game__home_team__pk=team)
         return self.gamelog_set.filter(q)
 
-    def average_points(self, game_logs=None):
-        if game_logs:
-            game_logs = game_logs.filter(player=self)
-        else:
-            game_logs = self.gamelog_set.all()
+    def averages(self, game_logs=None):
+        """The player's average points, minutes and points per minute, with a single aggregate query.
 
-        all_draft_king_points = [gl.draft_king_points for gl in game_logs]
-        if all_draft_king_points:
-            return round(sum(all_draft_king_points) / len(all_draft_king_points), 2)
-        return 0
+        Args:
+            game_logs: the `GameLog`s to average (only the player's are used), all of them when it's None or empty
 
-    def average_minutes(self, game_logs=None):
-        if game_logs:
+        Returns:
+            tuple of (average points, average minutes, average points per minute)
+
+        Raises:
+            ValueError: if some of the game logs haven't been scored, see `averages_from_totals()`
+        """
+        if game_logs is not None and game_logs.exists():
             game_logs = game_logs.filter(player=self)
         else:
             game_logs = self.gamelog_set.all()
+        totals = game_logs.order_by().aggregate(**AVERAGE_TOTALS)
+        return averages_from_totals(totals['points'], totals['minutes'], totals['games'], totals['scored'])
 
-        all_minutes = [gl.minutes for gl in game_logs]
-        if all_minutes:
-            return round(sum(all_minutes) / len(all_minutes), 2)
-        return 0
+    @staticmethod
+    def averages_for(players, game_logs=None):
+        """`averages()` of many players with a single query.
 
-    def average_ppm(self, game_logs=None):
-        if game_logs:
-            game_logs = game_logs.filter(player=self)
-        else:
-            game_logs = self.gamelog_set.all()
+        Args:
+            players: iterable of `Player`s
+            game_logs: the `GameLog`s to average, all of them when it's None or empty
 
-        avg_minutes = self.average_minutes(game_logs=game_logs)
-        avg_points = self.average_points(game_logs=game_logs)
-        if avg_minutes and avg_points:
-            return round(avg_points / avg_minutes, 2)
-        return 0
+        Returns:
+            dictionary of player pk -> (average points, average minutes, average points per minute)
+
+        Raises:
+            ValueError: if some of the game logs haven't been scored, see `averages_from_totals()`
+        """
+        if game_logs is None or not game_logs.exists():
+            game_logs = GameLog.objects.all()
+        players = list(players)
+        averages = {player.pk: (0, 0, 0) for player in players}
+        totals = game_logs.filter(player__in=players).order_by().values('player').annotate(**AVERAGE_TOTALS)
+        for row in totals:
+            averages[row['player']] = averages_from_totals(row['points'], row['minutes'], row['games'], row['scored'])
+        return averages
+
+    def average_points(self, game_logs=None):
+        return self.averages(game_logs=game_logs)[0]
+
+    def average_minutes(self, game_logs=None):
+        return self.averages(game_logs=game_logs)[1]
+
+    def average_ppm(self, game_logs=None):
+        return self.averages(game_logs=game_logs)[2]
 
     def total_games_last_x_days(self, x):
         return len(self.stats_last_x_days(x))
@@ -282,9 +354,25 @@ class GameLog(models.Model):
     field_goals_made = models.IntegerField()
     field_goals_attempted = models.IntegerField()
 
+    # `draft_king_points` and `points_per_min` as of the last save() or `basketball.utils.scoring.recompute()`
+    dk_points = models.FloatField(null=True, blank=True)
+    dk_ppm = models.FloatField(null=True, blank=True)
+    dk_scoring_version = models.CharField(max_length=40, null=True, blank=True, db_index=True)
+
     def __str__(self):
         return '{} - {}'.format(self.player, self.game)
 
+    def save(self, *args, **kwargs):
+        """Stores the draftking points along with the stats they are scored from.
+
+        Note:
+            `bulk_create()` and `loaddata` don't call `save()`, score those game logs with the `dk_points` command
+        """
+        self.dk_points = self.draft_king_points
+        self.dk_ppm = self.points_per_min
+        self.dk_scoring_version = scoring_version()
+        super(GameLog, self).save(*args, **kwargs)
+
     @property
     def rebounds(self):
         return self.defensive_rebounds + self.offensive_rebounds
@@ -363,6 +451,100 @@ class GameLog(models.Model):
         return points
 
 
+class TeamGameSummaryManager(models.Manager):
+
+    @transaction.atomic
+    def rebuild(self, games=None):
+        """(Re)builds the summaries of some games with a single aggregate query over their game logs.
+
+        Args:
+            games: queryset (or list) of `Game`s, by default every game
+
+        Returns:
+            the number of summaries built
+        """
+        game_logs = GameLog.objects.all()
+        summaries = self.all()
+        if games is not None:
+            game_logs = game_logs.filter(game__in=games)
+            summaries = summaries.filter(game__in=games)
+
+        totals = game_logs.order_by().values('game', 'team', 'game__home_team', 'game__away_team').annotate(
+            points=Sum(F('twos_made') * 2 + F('threes_made') * 3 + F('free_throws_made')),
+            dk_points=Sum('dk_points'),
+            minutes=Sum('minutes'))
+
+        by_game = defaultdict(dict)
+        for row in totals:
+            by_game[row['game']][row['team']] = row
+
+        new_summaries = []
+        for game_id, teams in by_game.items():
+            for team_id, row in teams.items():
+                home = team_id == row['game__home_team']
+                opponent_id = row['game__away_team'] if home else row['game__home_team']
+                opponent = teams.get(opponent_id, {})
+                new_summaries.append(TeamGameSummary(
+                    game_id=game_id,
+                    team_id=team_id,
+                    opponent_id=opponent_id,
+                    home=home,
+                    points=row['points'] or 0,
+                    dk_points=row['dk_points'] or 0.0,
+                    minutes=row['minutes'] or 0,
+                    opponent_points=opponent.get('points') or 0,
+                    opponent_dk_points=opponent.get('dk_points') or 0.0,
+                    opponent_minutes=opponent.get('minutes') or 0))
+
+        summaries.delete()
+        self.bulk_create(new_summaries, batch_size=500)
+        return len(new_summaries)
+
+    def update_new_games(self):
+        """Builds the summaries of the games that don't have any yet, e.g. the ones that were just scraped."""
+        return self.rebuild(Game.objects.filter(team_summaries=None))
+
+    def dk_points_by_team(self, season):
+        """The draftking points each team scored and allowed in every game of a season.
+
+        Returns:
+            dictionary of team name -> {'scored': [draftking points, ...], 'lost': [draftking points, ...]}
+        """
+        by_team = {}
+        for summary in self.filter(game__season=season).select_related('team'):
+            team = by_team.setdefault(str(summary.team), {'scored': [], 'lost': []})
+            team['scored'].append(summary.dk_points)
+            team['lost'].append(summary.opponent_dk_points)
+        return by_team
+
+
+class TeamGameSummary(models.Model):
+    """A team's box score of one game, the totals of its game logs and of its opponent's.
+
+    It's a materialized view of the `GameLog`s, so the scores of a game are a single indexed row per team.
+    Use `TeamGameSummary.objects.rebuild()` after the game logs change.
+    """
+    game = models.ForeignKey('Game', related_name='team_summaries')
+    team = models.ForeignKey('Team', related_name='game_summaries')
+    opponent = models.ForeignKey('Team', related_name='+', null=True, blank=True)
+    home = models.BooleanField(default=False)
+
+    points = models.IntegerField(default=0)
+    dk_points = models.FloatField(default=0)
+    minutes = models.IntegerField(default=0)
+    opponent_points = models.IntegerField(default=0)
+    opponent_dk_points = models.FloatField(default=0)
+    opponent_minutes = models.IntegerField(default=0)
+
+    objects = TeamGameSummaryManager()
+
+    class Meta:
+        unique_together = ('game', 'team')
+
+    def __str__(self):
+        return '{} - {}'.format(self.team, self.game)
+
+
 class Contest(models.Model):
     date = models.DateTimeField()
     description = models.TextField(blank=True)
@@ -0,0 +1,74 @@
+import random
+
+from django.test import SimpleTestCase
+
+from basketball.constants import SALARY_CAP
+from basketball.utils.benchmark import synthetic_slate
+from basketball.utils.engines import ENGINES
+from basketball.utils.pool import map_players_to_positions
+
+# Short runs, with small populations for the engines that breed whole generations
+RUNS = {
+    'annealing': ({}, 100),
+    'ga': ({}, 300),
+    'hill': ({}, 5000),
+    'islands': ({'n_islands': 2, 'population_size': 256, 'migration_interval': 5}, 10),
+    'milp': ({}, None),
+    'pareto': ({'population_size': 256}, 10),
+    'tabu': ({}, 2000),
+    'vector': ({'population_size': 256}, 10),
+}
+
+
+class EnginesTestCase(SimpleTestCase):
+    """Every engine must only ever come up with legal lineups, and the same ones for the same seed."""
+
+    def setUp(self):
+        self.gene_pool = map_players_to_positions(synthetic_slate(60, seed=0))
+
+    def run_engine(self, name, seed=1):
+        options, n = RUNS[name]
+        evolve = ENGINES[name](self.gene_pool, seed=seed, **options)
+        evolve.run(n, n_best=5)
+        return evolve
+
+    def assert_legal(self, lineup):
+        players = list(lineup.genes.values())
+        self.assertEqual(sorted(lineup.genes), sorted(self.gene_pool))
+        self.assertEqual(len(set(players)), len(players))
+        for slot, player in lineup.genes.items():
+            self.assertIn(player, self.gene_pool[slot])
+
+        # The running totals match the players
+        self.assertEqual(lineup.cost, sum(p.salary for p in players))
+        self.assertAlmostEqual(lineup.expected_points, sum(p.expected_points for p in players))
+        self.assertLessEqual(lineup.cost, SALARY_CAP)
+        self.assertTrue(lineup.can_survive())
+
+    def test_engines_are_tested(self):
+        self.assertEqual(sorted(RUNS), sorted(ENGINES))
+
+    def test_legal_lineups(self):
+        for name in sorted(ENGINES):
+            evolve = self.run_engine(name)
+            self.assertEqual(len(evolve.best), 5, name)
+            self.assertEqual(len(set(lineup.unique() for lineup in evolve.best)), 5, name)
+            fitness = [lineup.fitness_level() for lineup in evolve.best]
+            self.assertEqual(fitness, sorted(fitness, reverse=True), name)
+            for lineup in evolve.best:
+                self.assert_legal(lineup)
+
+    def test_seeded_runs(self):
+        for name in sorted(ENGINES):
+            runs = [
+                [sorted(lineup.genes.items()) for lineup in self.run_engine(name, seed=3).best]
+                for _ in range(2)]
+            self.assertEqual(runs[0], runs[1], name)
+
+    def test_global_random_untouched(self):
+        random.seed(0)
+        expected = random.random()
+        random.seed(0)
+        self.run_engine('ga')
+        self.run_engine('annealing')
+        self.assertEqual(random.random(), expected)
@@ -0,0 +1,75 @@
+import itertools
+
+from django.test import SimpleTestCase
+
+from basketball.utils.benchmark import synthetic_slate
+from basketball.utils.milp import MILPOptimizer, upper_bound
+from basketball.utils.pool import map_players_to_positions
+
+SALARY_CAP = 45000
+
+
+def brute_force(gene_pool, salary_cap=SALARY_CAP):
+    """Every legal lineup of a (small) gene pool, dictionary of the set of players -> expected points"""
+    slots = sorted(gene_pool.keys())
+    lineups = {}
+    for players in itertools.product(*[gene_pool[slot] for slot in slots]):
+        unique = frozenset(players)
+        if len(unique) == len(slots) and sum(p.salary for p in players) <= salary_cap:
+            lineups[unique] = sum(p.expected_points for p in players)
+    return lineups
+
+
+class MILPOptimizerTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.gene_pool = map_players_to_positions(synthetic_slate(14, seed=3))
+        self.lineups = brute_force(self.gene_pool)
+
+    def assert_legal(self, lineup):
+        self.assertLessEqual(lineup.cost, SALARY_CAP)
+        self.assertEqual(len(set(lineup.genes.values())), len(self.gene_pool))
+        for slot, player in lineup.genes.items():
+            self.assertIn(player, self.gene_pool[slot])
+
+    def test_best_lineups(self):
+        optimizer = MILPOptimizer(self.gene_pool, salary_cap=SALARY_CAP)
+        self.assertEqual(optimizer.run(n_best=5), MILPOptimizer.OPTIMAL)
+
+        expected = sorted(self.lineups.values(), reverse=True)[:5]
+        self.assertEqual(len(set(lineup.unique() for lineup in optimizer.best)), 5)
+        for lineup, points in zip(optimizer.best, expected):
+            self.assert_legal(lineup)
+            self.assertAlmostEqual(lineup.expected_points, points)
+
+    def test_exhausted(self):
+        # Only a handful of lineups are that cheap
+        lineups = brute_force(self.gene_pool, salary_cap=30000)
+        optimizer = MILPOptimizer(self.gene_pool, salary_cap=30000)
+        self.assertEqual(optimizer.run(n_best=len(lineups) + 1), MILPOptimizer.EXHAUSTED)
+        self.assertEqual(set(frozenset(lineup.genes.values()) for lineup in optimizer.best), set(lineups))
+
+    def test_avoid_and_exclude(self):
+        optimizer = MILPOptimizer(self.gene_pool, salary_cap=SALARY_CAP)
+        optimizer.run(n_best=2)
+        avoided = optimizer.best
+        excluded = avoided[0].genes['c']
+        optimizer.exclude([excluded])
+        optimizer.avoid(avoided, min_distance=3)
+        optimizer.run(n_best=3)
+
+        expected = sorted([
+            points for players, points in self.lineups.items()
+            if excluded not in players and
+            all(len(players - set(a.genes.values())) >= 3 for a in avoided)], reverse=True)[:3]
+        self.assertEqual(len(optimizer.best), 3)
+        for lineup, points in zip(optimizer.best, expected):
+            self.assert_legal(lineup)
+            self.assertNotIn(excluded, lineup)
+            self.assertAlmostEqual(lineup.expected_points, points)
+
+    def test_upper_bound(self):
+        optimizer = MILPOptimizer(self.gene_pool, salary_cap=SALARY_CAP)
+        bound = upper_bound(optimizer.pool, SALARY_CAP)
+        self.assertGreaterEqual(bound + 1e-6, max(self.lineups.values()))
+        self.assertLess(bound, max(self.lineups.values()) * 1.1)
@@ -0,0 +1,205 @@
+from datetime import datetime
+
+from django.test import TestCase
+
+from basketball.models import Game, GameLog, Player, Season, Team, TeamGameSummary
+
+STATS = (
+    'minutes', 'offensive_rebounds', 'defensive_rebounds', 'personal_fouls', 'assists', 'steals', 'blocks',
+    'turnovers', 'free_throws_made', 'free_throws_attempted', 'twos_made', 'twos_attempted', 'threes_made',
+    'threes_attempted', 'field_goals_made', 'field_goals_attempted',
+)
+
+
+def create_game_log(player, game, team, **stats):
+    values = {stat: 0 for stat in STATS}
+    values.update(stats)
+    return GameLog.objects.create(player=player, game=game, team=team, **values)
+
+
+class TeamGameSummaryTestCase(TestCase):
+
+    def setUp(self):
+        self.season = Season.objects.create(name='16')
+        self.home = Team.objects.create(city='Boston', name='Celtics', abbreviation='BOS')
+        self.away = Team.objects.create(city='New York', name='Knicks', abbreviation='NYK')
+        self.game = Game.objects.create(
+            date=datetime(2016, 11, 1), season=self.season, home_team=self.home, away_team=self.away)
+        self.home_players = [Player.objects.create(name='Home {}'.format(i), current_team=self.home) for i in range(2)]
+        self.away_player = Player.objects.create(name='Away', current_team=self.away)
+
+        create_game_log(self.home_players[0], self.game, self.home, minutes=30, twos_made=4, threes_made=2)
+        create_game_log(self.home_players[1], self.game, self.home, minutes=20, free_throws_made=3, assists=5)
+        create_game_log(self.away_player, self.game, self.away, minutes=40, threes_made=5, defensive_rebounds=7)
+
+    def game_logs(self, team):
+        return GameLog.objects.filter(game=self.game, team=team)
+
+    def test_rebuild(self):
+        self.assertEqual(TeamGameSummary.objects.rebuild(), 2)
+
+        home = TeamGameSummary.objects.get(game=self.game, team=self.home)
+        self.assertTrue(home.home)
+        self.assertEqual(home.opponent, self.away)
+        self.assertEqual(home.points, 4 * 2 + 2 * 3 + 3)
+        self.assertEqual(home.points, sum(gl.points for gl in self.game_logs(self.home)))
+        self.assertAlmostEqual(home.dk_points, sum(gl.draft_king_points for gl in self.game_logs(self.home)))
+        self.assertEqual(home.minutes, 50)
+
+        away = TeamGameSummary.objects.get(game=self.game, team=self.away)
+        self.assertFalse(away.home)
+        self.assertEqual(away.opponent, self.home)
+        self.assertEqual(away.points, 15)
+        self.assertEqual(away.opponent_points, home.points)
+        self.assertAlmostEqual(away.opponent_dk_points, home.dk_points)
+        self.assertEqual(away.opponent_minutes, home.minutes)
+        self.assertEqual(home.opponent_points, away.points)
+
+    def test_rebuild_replaces(self):
+        TeamGameSummary.objects.rebuild()
+        GameLog.objects.filter(team=self.away).update(twos_made=1)
+
+        self.assertEqual(TeamGameSummary.objects.rebuild([self.game]), 2)
+        self.assertEqual(TeamGameSummary.objects.count(), 2)
+        self.assertEqual(TeamGameSummary.objects.get(team=self.away).points, 17)
+        self.assertEqual(TeamGameSummary.objects.get(team=self.home).opponent_points, 17)
+
+    def test_update_new_games(self):
+        TeamGameSummary.objects.rebuild()
+        GameLog.objects.filter(team=self.away).update(twos_made=1)
+        game = Game.objects.create(
+            date=datetime(2016, 11, 3), season=self.season, home_team=self.away, away_team=self.home)
+        create_game_log(self.away_player, game, self.away, minutes=35, twos_made=6)
+
+        # Only the new game is built, the summaries of the other one are left alone
+        self.assertEqual(TeamGameSummary.objects.update_new_games(), 1)
+        self.assertEqual(TeamGameSummary.objects.get(game=self.game, team=self.away).points, 15)
+        summary = TeamGameSummary.objects.get(game=game)
+        self.assertEqual((summary.team, summary.opponent, summary.home), (self.away, self.home, True))
+        self.assertEqual((summary.points, summary.opponent_points), (12, 0))
+
+        self.assertEqual(TeamGameSummary.objects.update_new_games(), 0)
+
+    def test_team_score(self):
+        # Without a summary the score is summed from the game logs
+        self.assertEqual(self.game.home_team_score(), 17)
+        self.assertEqual(self.game.away_team_score(), 15)
+
+        TeamGameSummary.objects.rebuild()
+        game = Game.objects.get(pk=self.game.pk)
+        # Both scores come from the game's summaries, loaded once
+        with self.assertNumQueries(1):
+            self.assertEqual(game.team_score(self.home), 17)
+            self.assertEqual(game.team_score(self.away), 15)
+        self.assertEqual(game.winner(), self.home)
+
+
+class PlayerAveragesTestCase(TestCase):
+
+    def setUp(self):
+        season = Season.objects.create(name='16')
+        self.team = Team.objects.create(city='Boston', name='Celtics', abbreviation='BOS')
+        opponent = Team.objects.create(city='New York', name='Knicks', abbreviation='NYK')
+        self.games = [
+            Game.objects.create(date=datetime(2016, 11, day), season=season, home_team=self.team, away_team=opponent)
+            for day in (1, 3, 5)]
+        self.player = Player.objects.create(name='Player', current_team=self.team)
+        self.other = Player.objects.create(name='Other', current_team=self.team)
+        self.benched = Player.objects.create(name='Benched', current_team=self.team)
+
+        for game, minutes, twos in zip(self.games, (31, 25, 0), (7, 4, 0)):
+            create_game_log(self.player, game, self.team, minutes=minutes, twos_made=twos, assists=3)
+        create_game_log(self.other, self.games[0], self.team, minutes=12, threes_made=2, steals=1)
+
+    def expected(self, game_logs):
+        """The averages like the `Player` computed them from the `GameLog` properties"""
+        game_logs = list(game_logs)
+        avg_points = round(sum(gl.draft_king_points for gl in game_logs) / len(game_logs), 2)
+        avg_minutes = round(sum(gl.minutes for gl in game_logs) / len(game_logs), 2)
+        return avg_points, avg_minutes, round(avg_points / avg_minutes, 2)
+
+    def test_averages(self):
+        self.assertEqual(self.player.averages(), self.expected(self.player.gamelog_set.all()))
+        self.assertEqual(self.player.average_points(), round((14 + 4.5 + 8 + 4.5 + 0 + 4.5) / 3, 2))
+        self.assertEqual(self.player.average_minutes(), 56 // 3)
+        self.assertEqual(self.benched.averages(), (0, 0, 0))
+
+    def test_averages_window(self):
+        window = GameLog.objects.filter(game__date__lte=datetime(2016, 11, 3))
+        expected = self.expected(self.player.gamelog_set.filter(game__in=self.games[:2]))
+        self.assertEqual(self.player.averages(window), expected)
+        self.assertEqual(self.player.averages(window.filter(player=self.player)), self.player.averages(window))
+        self.assertEqual(self.benched.averages(window), (0, 0, 0))
+
+        # An empty window falls back to every game log
+        self.assertEqual(self.player.averages(GameLog.objects.none()), self.player.averages())
+
+    def test_averages_for(self):
+        window = GameLog.objects.filter(game__in=self.games[:2])
+        players = [self.player, self.other, self.benched]
+        with self.assertNumQueries(2):
+            averages = Player.averages_for(players, window)
+        self.assertEqual(averages, {player.pk: player.averages(window) for player in players})
+        self.assertEqual(Player.averages_for(players), {player.pk: player.averages() for player in players})
+
+    def test_unscored(self):
+        # bulk_create() and loaddata don't score the game logs
+        GameLog.objects.filter(game=self.games[2]).update(dk_points=None)
+        self.assertRaises(ValueError, self.player.averages)
+        self.assertRaises(ValueError, Player.averages_for, [self.player])
+        self.assertEqual(self.other.averages(), self.expected(self.other.gamelog_set.all()))
+
+
+class TeamGameLogsTestCase(TestCase):
+
+    def setUp(self):
+        season = Season.objects.create(name='16')
+        self.team = Team.objects.create(city='Boston', name='Celtics', abbreviation='BOS')
+        opponent = Team.objects.create(city='New York', name='Knicks', abbreviation='NYK')
+        players = [Player.objects.create(name='Player {}'.format(i), current_team=self.team) for i in range(3)]
+        rival = Player.objects.create(name='Rival', current_team=opponent)
+
+        # Created out of order, the groups are sorted by date
+        self.games = []
+        for day in (5, 1, 3):
+            game = Game.objects.create(
+                date=datetime(2016, 11, day), season=season, home_team=self.team, away_team=opponent)
+            for player in players[:day // 2 + 1]:
+                create_game_log(player, game, self.team, minutes=20 + day, twos_made=day)
+            create_game_log(rival, game, opponent, minutes=30)
+            self.games.append(game)
+
+    def test_grouped_by_game(self):
+        team = Team.objects.get(pk=self.team.pk)
+        with self.assertNumQueries(1):
+            grouped = team.game_logs_grouped_by_game()
+            # The game, player and team of the logs are loaded along with them
+            self.assertEqual(
+                [[(gl.game.date.day, gl.game.home_team, gl.player.name, gl.team) for gl in logs] for logs in grouped],
+                [[(day, self.team, 'Player {}'.format(i), self.team) for i in range(day // 2 + 1)]
+                 for day in (1, 3, 5)])
+
+    def test_grouped_by_game_window(self):
+        window = GameLog.objects.filter(game__date__gte=datetime(2016, 11, 3))
+        grouped = self.team.game_logs_grouped_by_game(window)
+        self.assertEqual([[gl.game for gl in logs] for logs in grouped], [[self.games[2]] * 2, [self.games[0]] * 3])
+        self.assertEqual(self.team.average_playtime(window), (23 * 2 + 25 * 3) / 2)
+
+    def test_grouped_by_game_cache(self):
+        team = Team.objects.get(pk=self.team.pk)
+        window = GameLog.objects.filter(game__date__gte=datetime(2016, 11, 3))
+        grouped = team.game_logs_grouped_by_game()
+        with self.assertNumQueries(0):
+            self.assertIs(team.game_logs_grouped_by_game(), grouped)
+            team.average_points()
+            team.average_playtime()
+
+        # The cache is keyed on the identity of the queryset, an equal queryset is grouped again
+        with self.assertNumQueries(1):
+            windowed = team.game_logs_grouped_by_game(window)
+        with self.assertNumQueries(0):
+            self.assertIs(team.game_logs_grouped_by_game(window), windowed)
+        with self.assertNumQueries(1):
+            self.assertEqual(team.game_logs_grouped_by_game(window.all()), windowed)
+        with self.assertNumQueries(1):
+            self.assertEqual(team.game_logs_grouped_by_game(), grouped)
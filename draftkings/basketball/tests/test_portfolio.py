@@ -0,0 +1,58 @@
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from basketball.constants import SALARY_CAP
+from basketball.utils.benchmark import synthetic_slate
+from basketball.utils.evolution import Evolve
+from basketball.utils.milp import MILPOptimizer
+from basketball.utils.pool import map_players_to_positions
+from basketball.utils.portfolio import Portfolio
+
+
+class PortfolioTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.gene_pool = map_players_to_positions(synthetic_slate(60, seed=0))
+        self.evolve = Evolve(self.gene_pool, seed=0)
+        self.lineup = self.evolve.generate_random_parent()
+
+    def replace(self, lineup, n):
+        """A copy of `lineup` with `n` of its players replaced by players it doesn't have"""
+        genes = dict(lineup.genes)
+        for slot in sorted(genes)[:n]:
+            genes[slot] = next(p for p in self.gene_pool[slot] if p not in genes.values() and p not in lineup)
+        return self.evolve.new_lineup(genes)
+
+    def test_accepts_exposure(self):
+        portfolio = Portfolio(self.evolve, max_exposure=0.5)
+        self.assertTrue(portfolio.accepts(self.lineup, 4))
+        portfolio.add(self.lineup)
+
+        # Every player can be in 2 of 4 lineups, but only in 1 of 3
+        self.assertTrue(portfolio.accepts(self.replace(self.lineup, 1), 4))
+        self.assertFalse(portfolio.accepts(self.replace(self.lineup, 1), 3))
+        self.assertTrue(portfolio.accepts(self.replace(self.lineup, 8), 3))
+
+        portfolio.add(self.replace(self.lineup, 1))
+        self.assertFalse(portfolio.accepts(self.replace(self.lineup, 2), 4))
+
+    def test_accepts_distance(self):
+        portfolio = Portfolio(self.evolve, min_distance=3)
+        portfolio.add(self.lineup)
+        self.assertFalse(portfolio.accepts(self.evolve.new_lineup(dict(self.lineup.genes)), 10))
+        self.assertFalse(portfolio.accepts(self.replace(self.lineup, 2), 10))
+        self.assertTrue(portfolio.accepts(self.replace(self.lineup, 3), 10))
+
+    def test_generate(self):
+        portfolio = Portfolio(MILPOptimizer(self.gene_pool), max_exposure=0.5, min_distance=2, archive_size=5)
+        lineups = list(portfolio.generate(4))
+
+        self.assertEqual(lineups, portfolio.lineups)
+        self.assertEqual(len(lineups), 4)
+        exposure = Counter(player for lineup in lineups for player in lineup.genes.values())
+        self.assertLessEqual(max(exposure.values()), 2)
+        for i, lineup in enumerate(lineups):
+            self.assertLessEqual(lineup.cost, SALARY_CAP)
+            for other in lineups[:i]:
+                self.assertGreaterEqual(lineup.distance(other), 2)
@@ -0,0 +1,53 @@
+from django.test import SimpleTestCase
+
+from basketball.utils.benchmark import SyntheticPlayer, synthetic_slate
+from basketball.utils.milp import MILPOptimizer
+from basketball.utils.pool import map_players_to_positions
+from basketball.utils.pruning import count_combinations, dominates, prune_dominated
+
+
+def player(name, salary, expected_points):
+    return SyntheticPlayer(name, {'PG'}, salary, expected_points)
+
+
+class PruningTestCase(SimpleTestCase):
+
+    def test_dominates(self):
+        star = player('star', 5000, 40)
+        self.assertTrue(dominates(star, player('worse', 5000, 30)))
+        self.assertTrue(dominates(star, player('pricier', 6000, 40)))
+        self.assertFalse(dominates(star, player('same', 5000, 40)))
+        self.assertFalse(dominates(star, player('cheaper', 4000, 10)))
+        self.assertFalse(dominates(star, player('better', 9000, 50)))
+
+    def test_prune_dominated(self):
+        cheap, dominated, other = player('cheap', 3000, 30), player('dominated', 4000, 20), player('other', 3500, 10)
+        star = player('star', 8000, 50)
+        gene_pool, removed = prune_dominated({'x': [cheap, dominated, star], 'y': [star, other]})
+        self.assertEqual(gene_pool, {'x': [cheap, star], 'y': [star, other]})
+        self.assertEqual(removed, {'x': [dominated], 'y': []})
+
+    def test_dominator_in_other_slots(self):
+        # The only dominator can be used in the other slot, so the dominated player has to stay
+        cheap, dominated, other = player('cheap', 3000, 30), player('dominated', 4000, 20), player('other', 3500, 10)
+        gene_pool, removed = prune_dominated({'x': [cheap, dominated], 'y': [cheap, other]})
+        self.assertEqual(gene_pool, {'x': [cheap, dominated], 'y': [cheap, other]})
+        self.assertEqual(removed, {'x': [], 'y': []})
+
+        # Unless there are more dominators than other slots
+        cheaper = player('cheaper', 2000, 25)
+        gene_pool, removed = prune_dominated({'x': [cheap, cheaper, dominated], 'y': [cheap, other]})
+        self.assertEqual(removed, {'x': [dominated], 'y': []})
+
+    def test_best_lineup_kept(self):
+        full = map_players_to_positions(synthetic_slate(60, seed=2))
+        pruned, removed = prune_dominated(full)
+        self.assertTrue(any(removed.values()))
+        self.assertLess(count_combinations(pruned), count_combinations(full))
+
+        best = []
+        for gene_pool in (full, pruned):
+            optimizer = MILPOptimizer(gene_pool)
+            optimizer.run(n_best=1)
+            best.append(optimizer.best[0].fitness_level())
+        self.assertAlmostEqual(best[0], best[1])
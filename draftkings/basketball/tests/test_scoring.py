@@ -0,0 +1,107 @@
+import random
+from datetime import datetime
+
+from django.test import TestCase
+
+from basketball.models import Game, GameLog, Player, Season, Team
+from basketball.utils.scoring import recompute, score_queryset, scoring_version
+
+STATS = (
+    'minutes', 'offensive_rebounds', 'defensive_rebounds', 'personal_fouls', 'assists', 'steals', 'blocks',
+    'turnovers', 'free_throws_made', 'free_throws_attempted', 'twos_made', 'twos_attempted', 'threes_made',
+    'threes_attempted', 'field_goals_made', 'field_goals_attempted',
+)
+
+
+class ScoringTestCase(TestCase):
+    """The columnar scoring of `basketball.utils.scoring` must match the `GameLog` properties exactly."""
+
+    def setUp(self):
+        season = Season.objects.create(name='16')
+        self.team = Team.objects.create(city='Boston', name='Celtics', abbreviation='BOS')
+        opponent = Team.objects.create(city='New York', name='Knicks', abbreviation='NYK')
+        self.game = Game.objects.create(
+            date=datetime(2016, 11, 1), season=season, home_team=self.team, away_team=opponent)
+        self.player = Player.objects.create(name='Player', current_team=self.team)
+
+        # A plain game, a game without minutes, double-doubles and triple-doubles
+        self.game_log(minutes=24, twos_made=3, twos_attempted=7, threes_made=1, threes_attempted=4,
+                      free_throws_made=1, free_throws_attempted=2, defensive_rebounds=4, assists=2, turnovers=3)
+        self.game_log()
+        self.game_log(minutes=34, twos_made=5, threes_made=0, free_throws_made=2, offensive_rebounds=3,
+                      defensive_rebounds=8, assists=1)
+        self.game_log(minutes=30, twos_made=1, offensive_rebounds=5, defensive_rebounds=5, assists=10)
+        self.game_log(minutes=38, twos_made=6, threes_made=2, free_throws_made=5, free_throws_attempted=6,
+                      defensive_rebounds=11, assists=10, steals=1, blocks=2, turnovers=5)
+        self.game_log(minutes=41, twos_made=2, defensive_rebounds=12, assists=11, steals=10, blocks=10)
+        # The bonuses don't count the turnovers
+        self.game_log(minutes=28, twos_made=5, assists=3, turnovers=10)
+
+        rnd = random.Random(0)
+        for _ in range(50):
+            stats = {
+                'minutes': rnd.randint(0, 48),
+                'offensive_rebounds': rnd.randint(0, 6),
+                'defensive_rebounds': rnd.randint(0, 12),
+                'assists': rnd.randint(0, 14),
+                'steals': rnd.randint(0, 5),
+                'blocks': rnd.randint(0, 5),
+                'turnovers': rnd.randint(0, 6),
+                'free_throws_made': rnd.randint(0, 8),
+                'twos_made': rnd.randint(0, 10),
+                'threes_made': rnd.randint(0, 6),
+            }
+            stats['free_throws_attempted'] = stats['free_throws_made'] + rnd.randint(0, 3)
+            self.game_log(**stats)
+
+    def game_log(self, **stats):
+        values = {stat: 0 for stat in STATS}
+        values.update(stats)
+        values.setdefault('twos_attempted', values['twos_made'])
+        values.setdefault('threes_attempted', values['threes_made'])
+        values['field_goals_made'] = values['twos_made'] + values['threes_made']
+        values['field_goals_attempted'] = values['twos_attempted'] + values['threes_attempted']
+        return GameLog.objects.create(player=self.player, game=self.game, team=self.team, **values)
+
+    def assert_matches_properties(self, columns, game_logs):
+        self.assertEqual(list(columns['pk']), [gl.pk for gl in game_logs])
+        for i, gl in enumerate(game_logs):
+            self.assertAlmostEqual(columns['draft_king_points'][i], gl.draft_king_points)
+            self.assertAlmostEqual(columns['points_per_min'][i], gl.points_per_min)
+            self.assertEqual(columns['efficiency_rating'][i], gl.efficiency_rating)
+
+    def test_score_queryset(self):
+        game_logs = GameLog.objects.order_by('pk')
+        self.assert_matches_properties(score_queryset(game_logs), list(game_logs))
+
+    def test_score_queryset_bonuses(self):
+        columns = score_queryset(GameLog.objects.order_by('pk'))
+        self.assertEqual(list(columns['double_double'][2:7]), [True, True, False, False, False])
+        self.assertEqual(list(columns['triple_double'][2:7]), [False, False, True, True, False])
+
+    def test_score_queryset_scoring(self):
+        scoring = {'twos': 2, 'rebounds': 1, 'double_double': 10, 'triple_double': 20}
+        game_logs = list(GameLog.objects.order_by('pk'))
+        with self.settings(DRAFT_KING_POINTS=scoring):
+            self.assert_matches_properties(score_queryset(GameLog.objects.order_by('pk'), scoring), game_logs)
+
+    def test_save(self):
+        for gl in GameLog.objects.all():
+            self.assertAlmostEqual(gl.dk_points, gl.draft_king_points)
+            self.assertAlmostEqual(gl.dk_ppm, gl.points_per_min)
+            self.assertEqual(gl.dk_scoring_version, scoring_version())
+
+    def test_recompute(self):
+        # bulk_create() and loaddata don't call save()
+        GameLog.objects.update(dk_points=None, dk_ppm=None, dk_scoring_version=None)
+        self.assertEqual(recompute(GameLog.objects.all()), GameLog.objects.count())
+        self.test_save()
+
+        self.assertEqual(recompute(GameLog.objects.all()), 0)
+        self.assertEqual(recompute(GameLog.objects.all(), everything=True), GameLog.objects.count())
+
+    def test_recompute_scoring(self):
+        scoring = {'twos': 2, 'rebounds': 1, 'double_double': 10, 'triple_double': 20}
+        with self.settings(DRAFT_KING_POINTS=scoring):
+            self.assertEqual(recompute(GameLog.objects.all()), GameLog.objects.count())
+            self.test_save()
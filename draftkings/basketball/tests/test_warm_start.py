@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+
+import simplejson as json
+from django.test import SimpleTestCase
+
+from basketball.constants import SALARY_CAP
+from basketball.utils.benchmark import synthetic_slate
+from basketball.utils.engines import ENGINES
+from basketball.utils.evolution import Evolve
+from basketball.utils.pool import map_players_to_positions
+from basketball.utils.warm_start import load_lineups, save_lineups
+
+
+class WarmStartTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'lineups.json')
+        self.players = synthetic_slate(60, seed=0)
+        self.gene_pool = map_players_to_positions(self.players)
+        evolve = Evolve(self.gene_pool, seed=0)
+        evolve.run(200, n_best=3)
+        self.lineups = evolve.best
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        save_lineups(self.path, self.lineups, date=date(2016, 11, 1))
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['date'], '2016-11-01')
+        self.assertEqual(load_lineups(self.path, self.gene_pool), [lineup.genes for lineup in self.lineups])
+
+    def test_missing_players(self):
+        save_lineups(self.path, self.lineups)
+        # The best lineup's center is ruled out
+        injured = self.lineups[0].genes['c']
+        gene_pool = map_players_to_positions([p for p in self.players if p is not injured])
+
+        loaded = load_lineups(self.path, gene_pool)
+        self.assertEqual(loaded[0]['c'], None)
+        for slot, player in loaded[0].items():
+            if slot != 'c':
+                self.assertIs(player, self.lineups[0].genes[slot])
+
+        for name in sorted(ENGINES):
+            evolve = ENGINES[name](gene_pool, seed=0)
+            warm = evolve.warm_start(loaded)
+            self.assertEqual(len(warm), len(loaded), name)
+            repaired = warm[0]
+            self.assertNotIn(injured, repaired)
+            self.assertLessEqual(repaired.cost, SALARY_CAP)
+            self.assertEqual(len(set(repaired.genes.values())), len(gene_pool))
+            # Only the empty slot is filled again
+            self.assertEqual(sum(1 for p in repaired.genes.values() if p in self.lineups[0]), 7, name)
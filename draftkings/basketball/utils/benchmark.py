@@ -0,0 +1,158 @@
+"""
+Benchmarks the lineup optimizers on synthetic slates.
+
+:func:`~basketball.utils.benchmark.synthetic_slate` creates a slate of players with realistic positions,
+salaries and projections without touching the database. :func:`~basketball.utils.benchmark.benchmark` runs
+every engine and configuration on the same slates with the same seeds and records the best fitness found
+against the wall-clock time and the number of evaluations. Each record is appended to a JSON lines file,
+so the results of different versions can be compared.
+"""
+import time
+
+import numpy
+import simplejson as json
+
+from basketball.utils.engines import ENGINES
+from basketball.utils.milp import MILPOptimizer
+from basketball.utils.pool import map_players_to_positions
+
+# The positions of the players on a typical slate, and how common they are
+POSITIONS = (
+    ({'PG'}, 0.14),
+    ({'PG', 'SG'}, 0.08),
+    ({'SG'}, 0.12),
+    ({'SG', 'SF'}, 0.08),
+    ({'SF'}, 0.12),
+    ({'SF', 'PF'}, 0.08),
+    ({'PF'}, 0.14),
+    ({'PF', 'C'}, 0.08),
+    ({'C'}, 0.16),
+)
+
+MIN_SALARY = 3000
+MAX_SALARY = 12000
+
+
+class SyntheticPlayer(object):
+    """Stands in for a `Player` with the attributes the optimizers use."""
+
+    def __init__(self, name, position, salary, expected_points):
+        self.name = name
+        self.position = position
+        self.salary = salary
+        self.expected_points = expected_points
+
+    def __repr__(self):
+        return '{} ({}) ${} {}pts'.format(self.name, '/'.join(sorted(self.position)), self.salary, self.expected_points)
+
+
+def synthetic_slate(n_players=150, seed=None):
+    """Creates a slate of random players.
+
+    Most players cost close to the minimum salary and a few stars cost over $10,000.
+    Players are expected to score around 5 points per $1,000 of salary, give or take.
+
+    Args:
+        n_players: the number of players on the slate
+        seed: seed for the random number generator, the same seed always creates the same slate
+
+    Returns:
+        list of `SyntheticPlayer`
+    """
+    rnd = numpy.random.RandomState(seed)
+    positions = rnd.choice(len(POSITIONS), size=n_players, p=[share for _, share in POSITIONS])
+    salaries = numpy.clip(MIN_SALARY + rnd.gamma(1.5, 1800, size=n_players), MIN_SALARY, MAX_SALARY)
+    salaries = (numpy.round(salaries / 100) * 100).astype(int)
+    value = numpy.maximum(rnd.normal(5.0, 1.0, size=n_players), 1.0)
+    points = numpy.round(salaries / 1000.0 * value, 2)
+
+    return [
+        SyntheticPlayer('Player {}'.format(i), set(POSITIONS[positions[i]][0]), int(salaries[i]), float(points[i]))
+        for i in range(n_players)]
+
+
+def run_engine(engine, gene_pool, n=10000, n_best=5, n_children=4, checkpoints=10, seed=None):
+    """Runs one engine, recording its best fitness at `checkpoints` points of the run.
+
+    The run is split in `checkpoints` calls to `run()`, every engine continues from its population.
+
+    Args:
+        engine: the name of the engine in `ENGINES`
+        gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+        n: the number of generations
+        n_best: the number of lineups to keep in `best`
+        n_children: the number of children bred each generation
+        checkpoints: the number of times to record the best fitness
+        seed: seed for the engine
+
+    Returns:
+        a list with a dictionary for each checkpoint
+    """
+    evolve = ENGINES[engine](gene_pool, seed=seed)
+    if isinstance(evolve, MILPOptimizer):
+        # The solver finds the optimum in one go
+        checkpoints = 1
+
+    records = []
+    started = time.time()
+    for i in range(checkpoints):
+        evolve.run(n // checkpoints, n_best=n_best, n_children=n_children)
+        elapsed = time.time() - started
+        records.append({
+            'checkpoint': i + 1,
+            'final': i + 1 == checkpoints,
+            'generations': (i + 1) * (n // checkpoints),
+            'elapsed': elapsed,
+            'evaluations': evolve.evaluations,
+            'evaluations_per_second': evolve.evaluations / elapsed if elapsed else 0,
+            'best_fitness': evolve.best[0].fitness_level() if evolve.best else None,
+        })
+    return records
+
+
+def benchmark(path, engines, slate_sizes=(150,), seeds=(0, 1, 2), configs=((10000, 5, 4),),
+              checkpoints=10, label=None):
+    """Benchmarks every engine and configuration on every slate, appending the results to `path`.
+
+    The optimal fitness of each slate is found with `MILPOptimizer` and recorded with each result,
+    along with the `gap` between it and the best fitness the engine found.
+
+    Args:
+        path: the JSON lines file the results are appended to
+        engines: the names of the engines in `ENGINES`
+        slate_sizes: the number of players of each slate
+        seeds: the seeds, each is used to create a slate and to run every engine on it
+        configs: tuples of (n, n_best, n_children) to run every engine with
+        checkpoints: the number of times to record the best fitness during a run
+        label: recorded with every result, e.g. the version being benchmarked
+
+    Returns:
+        a list of every result that was written
+    """
+    results = []
+    with open(path, 'a') as f:
+        for n_players in slate_sizes:
+            for seed in seeds:
+                gene_pool = map_players_to_positions(synthetic_slate(n_players, seed=seed))
+                reference = MILPOptimizer(gene_pool)
+                reference.run(n_best=1)
+                optimum = reference.best[0].fitness_level()
+
+                for engine in engines:
+                    for n, n_best, n_children in configs:
+                        for record in run_engine(engine, gene_pool, n, n_best, n_children, checkpoints, seed):
+                            record.update({
+                                'label': label,
+                                'timestamp': time.time(),
+                                'engine': engine,
+                                'n_players': n_players,
+                                'seed': seed,
+                                'n': n,
+                                'n_best': n_best,
+                                'n_children': n_children,
+                                'optimum': optimum,
+                                'gap': optimum - record['best_fitness'] if record['best_fitness'] is not None else None,
+                            })
+                            f.write(json.dumps(record, sort_keys=True) + '\n')
+                            results.append(record)
+    return results
@@ -29,7 +29,8 @@ class NBAManager(object):
 
     @classmethod
     def apply_season(cls, season):
-        games = Game.objects.filter(season=season, date__lt=datetime.now().date()).order_by('date')
+        games = Game.objects.filter(season=season, date__lt=datetime.now().date()).order_by('date').prefetch_related(
+            'team_summaries')
         cls.apply_games(games)
 
     @classmethod
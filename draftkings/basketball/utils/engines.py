@@ -0,0 +1,26 @@
+"""
+The lineup optimizers that can be picked by name, e.g. by the `lineups` and `benchmark` commands.
+
+Every engine is constructed with a `gene_pool` (and optionally a `seed`) and can be used in place of
+:class:`~basketball.utils.evolution.Evolve`.
+"""
+from basketball.utils.evolution import Evolve
+from basketball.utils.local_search import HillClimber, SimulatedAnnealing, TabuSearch
+from basketball.utils.milp import MILPOptimizer
+from basketball.utils.pareto import ParetoEvolve
+from basketball.utils.vector_evolution import IslandEvolve, VectorEvolve
+
+
+ENGINES = {
+    'annealing': SimulatedAnnealing,
+    'ga': Evolve,
+    'hill': HillClimber,
+    'islands': IslandEvolve,
+    'milp': MILPOptimizer,
+    'pareto': ParetoEvolve,
+    'tabu': TabuSearch,
+    'vector': VectorEvolve,
+}
+
+# The engines that score one lineup at a time, they take a `cache_size` for their `FitnessCache`
+CACHED_ENGINES = ('annealing', 'ga', 'hill', 'tabu')
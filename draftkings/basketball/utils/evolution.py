@@ -10,13 +10,21 @@ Evolvable in our case, represents a lineup with a cost and expected points.
 
 Evolve is able to generate new lineups (Evolvables) given a pool of players.
 
+:class:`~basketball.utils.evolution.StopCriteria` can stop `Evolve.run()` before all of its generations are done.
+
+:class:`~basketball.utils.evolution.FitnessCache` can remember the fitness level of the lineups an `Evolve` has seen.
+
 """
 import random
+import time
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict, defaultdict
 
-from texttable import Texttable
 import progressbar
 
+from basketball.constants import SALARY_CAP
+from basketball.utils.pool import PlayerPool
+
 
 class Evolvable(object):
     """ABC for use with the `Evolve` class.
@@ -39,12 +47,23 @@ class Evolvable(object):
             genes: list of the genes that each :class:`~basketball.utils.evolution.Evolvable` must have
 
         Note:
-            please see the code for how to use `_cache` and `cache_properties`
+            `_cache` holds the properties computed from the genes, `set_gene()` clears it
         """
         self._cache = {}
-        self.cache_properties = False
         self.genes = {gene: None for gene in genes}
 
+    def __contains__(self, expression):
+        """Whether or not any of the genes are expressed as `expression`"""
+        return expression in self.genes.values()
+
+    def set_gene(self, gene, expression):
+        """Sets the expression of one gene.
+
+        Always use this method rather than assigning to `self.genes` so subclasses can keep track of their genes.
+        """
+        self._cache.clear()
+        self.genes[gene] = expression
+
     @abstractmethod
     def can_survive(self):
         """
@@ -71,43 +90,242 @@ class Evolvable(object):
         """
         raise NotImplemented
 
+    def distance(self, other):
+        """The number of gene expressions in this `Evolvable` that are not in `other`"""
+        return len(set(self.genes.values()) - set(other.genes.values()))
+
 
 class EvolvableLineup(Evolvable):
-    """:class:`~basketball.utils.evolution.Evolvable` that is suited for a draftkings basketball lineup."""
+    """:class:`~basketball.utils.evolution.Evolvable` that is suited for a draftkings basketball lineup.
+
+    The lineup keeps running totals of its cost and expected points, a set of its players and
+    a bitmask of its players' ids. They are updated by `set_gene()` so they never need to be re-computed.
+    """
+
+    def __init__(self, genes, ids=None, scorer=None, cache=None):
+        """
+        Args:
+            genes: list of the roster slots
+            ids: dictionary of player -> dense integer id (e.g. `PlayerPool.ids`), used for the bitmask.
+                Without it `unique()` falls back to a frozenset of the players.
+            scorer: optional object with a `score(lineup)` method used as the fitness level
+                (e.g. :class:`~basketball.utils.fitness.CovarianceScorer`), by default it's the expected points.
+            cache: optional :class:`~basketball.utils.evolution.FitnessCache` shared with other lineups,
+                so the `scorer` is only asked once for the same players.
+        """
+        super(EvolvableLineup, self).__init__(genes)
+        self._ids = ids
+        self.scorer = scorer
+        self.fitness_cache = cache
+        self._players = set()
+        self._mask = 0
+        self._cost = 0
+        self._expected_points = 0
+
+    @classmethod
+    def from_genes(cls, genes, ids=None, scorer=None, cache=None):
+        """Creates a lineup from a dictionary of slot -> player"""
+        lineup = cls(genes.keys(), ids=ids, scorer=scorer, cache=cache)
+        for gene, player in genes.items():
+            lineup.set_gene(gene, player)
+        return lineup
+
+    def __contains__(self, player):
+        return player in self._players
+
+    def set_gene(self, gene, player):
+        """Puts `player` in the `gene` slot, updating the running totals by the difference."""
+        replaced = self.genes[gene]
+        if replaced is not None:
+            self._players.discard(replaced)
+            self._cost -= replaced.salary
+            self._expected_points -= replaced.expected_points
+            if self._ids is not None:
+                self._mask &= ~(1 << self._ids[replaced])
+        if player is not None:
+            self._players.add(player)
+            self._cost += player.salary
+            self._expected_points += player.expected_points
+            if self._ids is not None:
+                self._mask |= 1 << self._ids[player]
+        super(EvolvableLineup, self).set_gene(gene, player)
+
     @property
     def expected_points(self):
         """The number of draftking points this lineup is expected to produce"""
-        if not self.cache_properties:
-            self._cache['expected_points'] = sum(
-                [player.expected_points for player in self.genes.values() if player])
-        return self._cache['expected_points']
+        return self._expected_points
 
     @property
     def cost(self):
         """How much does this lineup cost in terms of salary"""
-        if not self.cache_properties:
-            self._cache['cost'] = sum(
-                [player.salary for player in self.genes.values() if player])
-        return self._cache['cost']
+        return self._cost
 
     @property
-    def unique_str(self):
-        if not self.cache_properties:
-            players = self.genes.values()
-            players.sort(key=lambda k: str(k.name))
-            self._cache['unique_str'] = ''.join(str(p.name) for p in players)
-        return self._cache['unique_str']
+    def mask(self):
+        """Bitmask with a bit set for the id of every player in the lineup"""
+        return self._mask
 
     def can_survive(self):
         """Our lineups cannot survive if they cost more than 50,000"""
-        return self.cost <= 50000
+        return self.cost <= SALARY_CAP
 
     def fitness_level(self):
-        """The more draftking points the better the lineup"""
-        return self.expected_points
+        """The more draftking points the better the lineup, unless there is a `scorer` to ask"""
+        if self.scorer is None:
+            return self.expected_points
+        if 'fitness_level' not in self._cache:
+            if self.fitness_cache is None:
+                self._cache['fitness_level'] = self.scorer.score(self)
+            else:
+                self._cache['fitness_level'] = self.fitness_cache.lookup(self)
+        return self._cache['fitness_level']
+
+    def evaluate(self):
+        """Computes the fitness level a `FitnessCache` remembers, the cost and feasibility are running totals"""
+        return self.expected_points if self.scorer is None else self.scorer.score(self)
 
     def unique(self):
-        return self.unique_str
+        """The players' bitmask, the same players in different slots are the same lineup."""
+        if self._ids is None:
+            return frozenset(self._players)
+        return self._mask
+
+    def distance(self, other):
+        """The number of players in this lineup that are not in `other`"""
+        if self._ids is None or other._ids is not self._ids:
+            return len(self._players - other._players)
+        return bin(self._mask & ~other._mask).count('1')
+
+
+class FitnessCache(object):
+    """Bounded LRU cache of the fitness level of lineups, keyed by their `unique()`.
+
+    Sharing one cache between all the lineups of an `Evolve` means a `scorer` is only asked once for the same
+    players. Without a `scorer` the lineups' running totals are cheaper than a lookup, so the cache is not used.
+
+    It's off by default (see `Evolve`'s `cache_size` and the `--cache-size` of the `lineups` command): on a full
+    slate the evolution rarely breeds the same lineup twice, and the lookups cost more than they save.
+    Check `hits` and `misses` (e.g. in the `--metrics` file) before turning it on.
+
+    `hits` and `misses` count the lookups.
+    """
+
+    def __init__(self, maxsize=100000):
+        """
+        Args:
+            maxsize: the number of lineups to remember, the least recently used are forgotten first
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, evolvable):
+        """The fitness level of `evolvable`, computed with its `evaluate()` on a miss"""
+        key = evolvable.unique()
+        try:
+            entry = self.entries.pop(key)
+            self.hits += 1
+        except KeyError:
+            entry = evolvable.evaluate()
+            self.misses += 1
+            if len(self.entries) >= self.maxsize:
+                self.entries.popitem(last=False)
+        self.entries[key] = entry
+        return entry
+
+    def clear(self):
+        """Forgets every lineup, e.g. when the fitness level changes"""
+        self.entries.clear()
+
+
+def optimality_gap(fitness, upper_bound):
+    """How far `fitness` is from `upper_bound`, as a fraction of the bound.
+
+    The best lineup is at most that much better than a lineup of fitness level `fitness`.
+    """
+    if fitness is None or not upper_bound:
+        return None
+    return max(0.0, (upper_bound - fitness) / abs(upper_bound))
+
+
+class OptimalityGap(progressbar.DynamicMessage):
+    """Shows the optimality gap of the best lineup next to a progress bar, see `Evolve.progress_bar()`"""
+
+    def __init__(self):
+        super(OptimalityGap, self).__init__('gap')
+
+    def __call__(self, progress, data):
+        gap = data['dynamic_messages'][self.name]
+        return 'gap: ' + ('{:.2%}'.format(gap) if gap is not None else '-')
+
+
+class StopCriteria(object):
+    """Decides when an evolution should stop early.
+
+    Any combination of the criteria can be used, the evolution stops as soon as one of them is met.
+    """
+
+    COMPLETED = 'completed all generations'
+    CONVERGED = 'no improvement in the best lineups'
+    TIME_BUDGET = 'ran out of time'
+    TARGET = 'reached the target fitness'
+    GAP = 'within epsilon of the upper bound'
+
+    def __init__(self, patience=None, time_budget=None, target=None, epsilon=None, upper_bound=None):
+        """
+        Args:
+            patience: stop after this many generations without the best fitness levels improving, or whatever
+                the engine checks after (see `Evolve.PATIENCE_UNIT`)
+            time_budget: stop after this many seconds
+            target: stop once the best fitness level is at least this
+            epsilon: stop once the best fitness level is within this fraction of `upper_bound`,
+                see `optimality_gap()`
+            upper_bound: no lineup can have a higher fitness level, see `Evolve.upper_bound()`
+        """
+        self.patience = patience
+        self.time_budget = time_budget
+        self.target = target
+        self.epsilon = epsilon
+        self.upper_bound = upper_bound
+        self.start()
+
+    def start(self):
+        """Resets the clock and the generation counters, called at the start of every run."""
+        self.started = time.time()
+        self.generation = 0
+        self.last_improvement = 0
+        self.best = None
+
+    def check(self, best):
+        """Called after every generation.
+
+        Args:
+            best: the fitness levels of the best of all time, best first.
+
+        Returns:
+            the reason to stop or None if the evolution should continue
+        """
+        self.generation += 1
+        best = tuple(best)
+        if self.best is None or best > self.best:
+            self.best = best
+            self.last_improvement = self.generation
+
+        if self.target is not None and best and best[0] >= self.target:
+            return self.TARGET
+        if self.epsilon is not None and best:
+            gap = optimality_gap(best[0], self.upper_bound)
+            if gap is not None and gap <= self.epsilon:
+                return self.GAP
+        if self.patience is not None and self.generation - self.last_improvement >= self.patience:
+            return self.CONVERGED
+        if self.time_budget is not None and time.time() - self.started >= self.time_budget:
+            return self.TIME_BUDGET
+        return None
 
 
 class Evolve(object):
@@ -116,24 +334,57 @@ class Evolve(object):
     This class will take a `gene_pool` and will generate random Evolvables from the gene_pool.
     It can then combine those Evolvables to create Evolvables with a new and unique set of genes.
     This process happens iteratively, each time only the best Evolvables are chosen to create new Evolvables from.
+
+    `PATIENCE_UNIT` is what `run()` checks its :class:`~basketball.utils.evolution.StopCriteria` after, so the unit
+    of its `patience`. None for the engines that don't stop early.
     """
 
-    def __init__(self, gene_pool):
+    PATIENCE_UNIT = 'generations'
+
+    def __init__(self, gene_pool, seed=None, cache_size=None):
         """Initialize the `Evolve` class with a gene pool
 
         Args:
             gene_pool: A dictionary with "genes" for keys, and a list of "gene_expressions" as the value.
+            seed: seed of `self.random`, for reproducible runs
+            cache_size: the number of lineups `self.fitness_cache` remembers, no cache by default
 
         Note:
+            `self.random` the `random.Random` every random choice is made with, shared with `self.pool`
+            `self.pool` a :class:`~basketball.utils.pool.PlayerPool` giving each player a dense integer id
             `self.best` an aggregate of the best :class:`~basketball.utils.evolution.Evolvable`s from every generation
             `self.population` represents the current generation and is assigned after every iteration in `run()`
             `self.best` is updated after every iteration in `run()`
+            `self.evaluations` the number of `Evolvable`s created so far, including those that could not survive
+            `self.rejected` the number of `Evolvable`s created so far that could not survive
+            `self.mutations` the number of genes replaced by `mutate()` so far
+            `self.timings` the number of seconds spent in each operator so far
+            `self.callbacks` are called after every generation, see `add_callback()`
+            `self.scorer` the optional fitness level of the lineups, see `set_scorer()`
+            `self.bound` the cached `upper_bound()`, reset when players are excluded
+            `self.fitness_cache` an optional :class:`~basketball.utils.evolution.FitnessCache` shared by every
+            lineup created with `new_lineup()`, so `cross_over()`, `mutate()` and `set_best()` never score the
+            same players twice
         """
+        self.random = random.Random(seed)
         self.gene_pool = gene_pool
+        self.pool = PlayerPool(gene_pool, rnd=self.random)
         self.population = []
         self.best = []
-
-    def run(self, n=1000, n_best=5, n_children=4):
+        self.stop_reason = None
+        self.avoided = []
+        self.min_distance = 1
+        self.evaluations = 0
+        self.rejected = 0
+        self.mutations = 0
+        self.timings = defaultdict(float)
+        self.callbacks = []
+        self.scorer = None
+        self.bound = None
+        self.fitness_cache = FitnessCache(cache_size) if cache_size else None
+        self.start_metrics()
+
+    def run(self, n=1000, n_best=5, n_children=4, stop=None):
         """Starts and runs the evolution process.
 
         1. Create the initial population
@@ -143,19 +394,178 @@ class Evolve(object):
         Args:
             n: the number of generations
             n_children: the number of children each group of parents will produce
-            n_print: print the 'best of all time' after every `n_print` generations
+            stop: optional :class:`~basketball.utils.evolution.StopCriteria` to stop before `n` generations
+
+        Returns:
+            The reason the evolution stopped (also assigned to `self.stop_reason`)
         """
         if not self.population:
             self.population = [self.generate_random_parent() for _ in range(n_children)]
             self.set_best()
 
-        bar = progressbar.ProgressBar(min_value=0, max_value=n)
+        if stop is not None:
+            stop.start()
+        self.stop_reason = StopCriteria.COMPLETED
+        self.start_metrics()
+
+        bar = self.progress_bar(n)
 
         for i in xrange(n):
+            started = time.time()
             parents = self.best_parents()
+            selected = time.time()
+            mutating = self.timings['mutate']
             self.population = [self.cross_over(parents) for _ in range(n_children)]
+            bred = time.time()
             self.set_best(n_best=n_best)
-            bar.update(i + 1)
+            self.timings['best_parents'] += selected - started
+            # cross_over() calls mutate(), which times itself
+            self.timings['cross_over'] += bred - selected - (self.timings['mutate'] - mutating)
+            self.timings['set_best'] += time.time() - bred
+            self.update_progress(bar, i + 1, self.best[0].fitness_level() if self.best else None)
+
+            if self.callbacks:
+                self.emit_metrics(
+                    i + 1,
+                    self.best[0].fitness_level() if self.best else None,
+                    sum(p.fitness_level() for p in self.population) / float(len(self.population)))
+
+            if stop is not None:
+                reason = stop.check(b.fitness_level() for b in self.best)
+                if reason:
+                    self.stop_reason = reason
+                    break
+
+        return self.stop_reason
+
+    def new_lineup(self, genes=None):
+        """Creates an `EvolvableLineup` that uses the pool's ids and `self.scorer`
+
+        Args:
+            genes: optional dictionary of slot -> player, by default every slot is empty
+        """
+        if genes is None:
+            return EvolvableLineup(
+                self.gene_pool.keys(), ids=self.pool.ids, scorer=self.scorer, cache=self.fitness_cache)
+        return EvolvableLineup.from_genes(genes, ids=self.pool.ids, scorer=self.scorer, cache=self.fitness_cache)
+
+    def set_scorer(self, scorer):
+        """Changes the fitness level of the lineups, e.g. to a :class:`~basketball.utils.fitness.CovarianceScorer`
+
+        Args:
+            scorer: object with a `score(lineup)` method, or None for the expected points
+        """
+        self.scorer = scorer
+        if self.fitness_cache is not None:
+            self.fitness_cache.clear()
+        for lineup in list(self.population) + self.best:
+            lineup.scorer = scorer
+            lineup._cache.clear()
+        self.best = sorted(self.best, key=lambda k: k.fitness_level(), reverse=True)
+
+    def upper_bound(self):
+        """The most expected points any lineup of the gene pool can have.
+
+        It's the optimum of the LP relaxation of the lineup program (see :func:`~basketball.utils.milp.upper_bound`),
+        solved once and cached until players are excluded.
+
+        Returns:
+            the bound, or None if there is a `scorer` (the bound only holds for the expected points)
+        """
+        if self.scorer is not None:
+            return None
+        if self.bound is None:
+            from basketball.utils.milp import upper_bound
+            self.bound = upper_bound(self.pool)
+        return self.bound
+
+    def progress_bar(self, n):
+        """A progress bar of `n` steps, it also shows the optimality gap once `upper_bound()` is computed
+
+        Update it with `update_progress()`.
+        """
+        bar = progressbar.ProgressBar(min_value=0, max_value=n)
+        if self.bound is not None and self.scorer is None:
+            bar = progressbar.ProgressBar(
+                min_value=0, max_value=n, widgets=bar.default_widgets() + [' ', OptimalityGap()])
+        return bar
+
+    def update_progress(self, bar, value, best_fitness):
+        """Moves a bar of `progress_bar()` to `value`, with the gap between `best_fitness` and the upper bound"""
+        if 'gap' in bar.dynamic_messages:
+            if bar.start_time is None:
+                # The first update() starts the bar and drops its dynamic messages
+                bar.start()
+            bar.update(value, gap=optimality_gap(best_fitness, self.bound))
+        else:
+            bar.update(value)
+
+    def add_callback(self, callback):
+        """Calls `callback(evolve, metrics)` after every generation of `run()`
+
+        `metrics` is a dictionary, see `emit_metrics()`
+        """
+        self.callbacks.append(callback)
+
+    def counters(self):
+        """The running totals of the evolution, a dictionary of `evaluations`, `rejected`, `mutations`, `timings`,
+        and with a `self.fitness_cache` its `cache_hits` and `cache_misses`
+        """
+        counters = {
+            'evaluations': self.evaluations,
+            'rejected': self.rejected,
+            'mutations': self.mutations,
+            'timings': dict(self.timings),
+        }
+        if self.fitness_cache is not None:
+            counters['cache_hits'] = self.fitness_cache.hits
+            counters['cache_misses'] = self.fitness_cache.misses
+        return counters
+
+    def start_metrics(self):
+        """Resets the clock and the best fitness that `emit_metrics()` measures from, called at the start of `run()`"""
+        self._metrics_started = time.time()
+        self._last_metrics = (self._metrics_started, self.evaluations)
+        self._best_fitness = None
+        self._last_improvement = 0
+
+    def emit_metrics(self, generation, best_fitness, mean_fitness):
+        """Calls every callback with the metrics of a generation.
+
+        The metrics are a dictionary of:
+
+         - `generation` the generation of the current `run()`
+         - `elapsed` seconds since the start of the current `run()`
+         - `best_fitness` and `mean_fitness` of the generation
+         - `stale_generations` the number of generations since `best_fitness` last improved
+         - `evaluations_per_second` since the previous generation
+         - `evaluations`, `rejected`, `mutations` and `timings` (seconds per operator) totals, see `counters()`
+         - `upper_bound` and `gap` the optimality gap of `best_fitness`, see `optimality_gap()`; only once
+           `upper_bound()` has been computed, it's too slow to solve every generation, None otherwise
+        """
+        now = time.time()
+        counters = self.counters()
+        last_time, last_evaluations = self._last_metrics
+        self._last_metrics = (now, counters['evaluations'])
+
+        if best_fitness is not None and (self._best_fitness is None or best_fitness > self._best_fitness):
+            self._best_fitness = best_fitness
+            self._last_improvement = generation
+
+        metrics = dict(counters)
+        metrics.update({
+            'generation': generation,
+            'elapsed': now - self._metrics_started,
+            'best_fitness': best_fitness,
+            'mean_fitness': mean_fitness,
+            'stale_generations': generation - self._last_improvement,
+            'evaluations_per_second': (
+                (counters['evaluations'] - last_evaluations) / (now - last_time) if now > last_time else 0),
+            'upper_bound': self.bound if self.scorer is None else None,
+        })
+        metrics['gap'] = optimality_gap(best_fitness, metrics['upper_bound'])
+        for callback in self.callbacks:
+            callback(self, metrics)
 
     def set_best(self, n_best=5):
         """
@@ -163,6 +573,8 @@ class Evolve(object):
         """
         unique = set()
         values = self.best + self.population
+        if self.avoided:
+            values = self.best + [v for v in self.population if self.is_new(v)]
         best = []
         for v in values:
             if v.unique() not in unique:
@@ -183,32 +595,139 @@ class Evolve(object):
         """
         return sorted(self.population, key=lambda k: k.fitness_level(), reverse=True)[:n]
 
-    def generate_random_parent(self):
+    def exclude(self, expressions):
+        """Removes gene expressions from the `gene_pool` and every `Evolvable` that has one of them.
+
+        Args:
+            expressions: iterable of gene expressions (players) that can no longer be used
+        """
+        expressions = set(expressions)
+        self.gene_pool = {
+            gene: [e for e in gene_expressions if e not in expressions]
+            for gene, gene_expressions in self.gene_pool.items()}
+        self.pool.exclude(expressions)
+        self.bound = None
+        self.population = [v for v in self.population if not any(e in v for e in expressions)]
+        self.best = [v for v in self.best if not any(e in v for e in expressions)]
+
+    def avoid(self, evolvables, min_distance=1):
+        """Keeps `self.best` away from some `Evolvable`s (e.g. lineups that have already been picked).
+
+        Args:
+            evolvables: the `Evolvable`s to avoid
+            min_distance: the minimum number of genes an Evolvable in `self.best` must not share with each of them
+        """
+        self.avoided = list(evolvables)
+        self.min_distance = min_distance
+        self.best = [v for v in self.best if self.is_new(v)]
+
+    def is_new(self, evolvable):
+        """Whether or not `evolvable` is far enough from all the avoided `Evolvable`s, see `avoid()`"""
+        return all(evolvable.distance(a) >= self.min_distance for a in self.avoided)
+
+    def repair(self, genes, max_attempts=100):
+        """Creates an `Evolvable` that can survive from genes that might no longer be legal.
+
+        Every gene expression that is still in the `gene_pool` is kept, the others (or `None`s)
+        are replaced with random expressions from the `gene_pool`.
+
+        Args:
+            genes: dictionary of gene -> gene expression, e.g. a lineup from a previous run
+            max_attempts: the number of times to try filling the replaced genes
+
+        Returns:
+            the repaired `Evolvable`, or None if it could not be repaired
+        """
+        evolvable = self.new_lineup()
+        missing = []
+        for gene in self.gene_pool.keys():
+            expression = genes.get(gene)
+            if expression in self.pool.ids and expression not in evolvable and self.pool.eligible(expression, gene):
+                evolvable.set_gene(gene, expression)
+            else:
+                missing.append(gene)
+
+        for _ in range(max_attempts):
+            for gene in missing:
+                evolvable.set_gene(gene, None)
+            if self.complete(evolvable, missing) and evolvable.can_survive():
+                return evolvable
+        return None
+
+    def warm_start(self, lineups):
+        """Adds lineups (e.g. the best of a previous run) to the population so `run()` continues from them.
+
+        Args:
+            lineups: iterable of gene dictionaries, they are repaired with `repair()` first
+
+        Returns:
+            the `Evolvable`s that were added, lineups that could not be repaired are left out
+        """
+        seeded = [e for e in (self.repair(genes) for genes in lineups) if e is not None]
+        self.population = list(self.population) + seeded
+        self.set_best(n_best=len(self.best) + len(seeded))
+        return seeded
+
+    def complete(self, evolvable, genes):
+        """Fills the empty `genes` of `evolvable`, in a random order, with players that keep it under the cap.
+
+        Each gene is given a random player that leaves enough of the cap for the cheapest players of the genes
+        that are still empty (see `PlayerPool.min_cost()`), so only players that can still lead to a legal
+        lineup are drawn.
+
+        Returns:
+            whether every gene could be filled, it only fails when the same cheap players are
+            the cheapest of several of the empty genes
+        """
+        genes = list(genes)
+        self.random.shuffle(genes)
+        reserve = self.pool.min_cost(genes)
+        for gene in genes:
+            reserve -= self.pool.min_salary[gene]
+            expression = self.pool.sample(gene, max_salary=SALARY_CAP - evolvable.cost - reserve, used=evolvable)
+            if expression is None:
+                return False
+            evolvable.set_gene(gene, expression)
+        return True
+
+    def generate_random_parent(self, max_attempts=1000):
         """Generates a random `Evolvable` using genes from the `gene_pool`.
 
+        The genes are filled with `complete()`, so almost every attempt can survive.
+
+        Args:
+            max_attempts: give up after this many `Evolvable`s that could not survive
+
+        Raises:
+            ValueError: if none of the attempts could survive, e.g. too many players were excluded
+
         Returns:
             Evolvable randomly created from the `gene_pool`
         """
-        parent = EvolvableLineup(self.gene_pool.keys())
-        while True:
-            for gene, expression in self.gene_pool.iteritems():
-                while True:
-                    random_gene_expression = random.choice(expression)
-                    if random_gene_expression not in parent.genes.values():
-                        parent.genes[gene] = random_gene_expression
-                        break
-            if parent.can_survive():
-                parent.cache = True
+        parent = self.new_lineup()
+        for _ in range(max_attempts):
+            for gene in self.gene_pool.keys():
+                parent.set_gene(gene, None)
+            filled = self.complete(parent, self.gene_pool.keys())
+            self.evaluations += 1
+            if filled and parent.can_survive():
                 return parent
+            self.rejected += 1
+        raise ValueError('Unable to generate lineups that are under the salary cap.')
 
-    def cross_over(self, parents):
+    def cross_over(self, parents, max_attempts=1000):
         """Combines 1 or more parents into a single child.
 
         For each gene in the child this function will choose the expression from a randomly selected parent
-        If no such expression is possible then an expression will be selected from the 'gene_pool'
+        If no such expression is possible (it's already used, or it doesn't leave enough of the cap for the
+        cheapest players of the other genes) then the gene is filled from the 'gene_pool' by `complete()`
 
         Args:
             parents (Evolvable): sequence of `Evolvable`s
+            max_attempts: give up after this many children that could not survive
+
+        Raises:
+            ValueError: if none of the children could survive
 
         Note:
             If no expressions from the `gene_pool` is used then `mutate()` is called on the child.
@@ -216,27 +735,39 @@ class Evolve(object):
         Returns:
             Evolvable created by combining the parents and inserting a mutation from the `gene_pool`.
         """
-        child = EvolvableLineup(self.gene_pool.keys())
-
-        while True:
-            mutated = False
-
-            for gene in self.gene_pool.keys():
-                random_parent = random.choice(parents)
+        child = self.new_lineup()
+        genes = list(self.gene_pool.keys())
+
+        for _ in range(max_attempts):
+            for gene in genes:
+                child.set_gene(gene, None)
+            self.random.shuffle(genes)
+
+            # The least the genes that are still empty can cost
+            reserve = self.pool.min_cost(genes)
+            missing = []
+            for gene in genes:
+                random_parent = self.random.choice(parents)
                 random_gene_expression = random_parent.genes[gene]
-
-                while True:
-                    if random_gene_expression not in child.genes.values():
-                        child.genes[gene] = random_gene_expression
-                        break
-                    mutated = True
-                    random_gene_expression = random.choice(self.gene_pool[gene])
-            if not mutated:
+                others = reserve - self.pool.min_salary[gene]
+
+                if random_gene_expression in child or child.cost + random_gene_expression.salary + others > SALARY_CAP:
+                    missing.append(gene)
+                else:
+                    child.set_gene(gene, random_gene_expression)
+                    reserve = others
+
+            filled = True
+            if missing:
+                filled = self.complete(child, missing)
+            else:
                 self.mutate(child)
 
-            if child.can_survive():
-                child.cache = True
+            self.evaluations += 1
+            if filled and child.can_survive():
                 return child
+            self.rejected += 1
+        raise ValueError('Unable to generate lineups that are under the salary cap.')
 
     def mutate(self, evolvable, n1=1, n2=2):
         """
@@ -249,61 +780,25 @@ class Evolve(object):
         Returns:
             None
         """
-        swap = random.randint(n1, n2)
+        started = time.time()
+        swap = self.random.randint(n1, n2)
+        self.mutations += swap
         for i in range(swap):
-            while True:
-                random_gene = random.choice(self.gene_pool.keys())
-                random_gene_expression = random.choice(self.gene_pool[random_gene])
-                if random_gene_expression not in evolvable.genes.values():
-                    evolvable.genes[random_gene] = random_gene_expression
-                    break
+            random_gene = self.random.choice(self.gene_pool.keys())
+
+            # Prefer a player that keeps the lineup under the cap
+            budget = SALARY_CAP - evolvable.cost
+            if evolvable.genes[random_gene] is not None:
+                budget += evolvable.genes[random_gene].salary
+            random_gene_expression = (
+                self.pool.sample(random_gene, max_salary=budget, used=evolvable) or
+                self.pool.sample(random_gene, used=evolvable))
+
+            if random_gene_expression is not None:
+                evolvable.set_gene(random_gene, random_gene_expression)
+        self.timings['mutate'] += time.time() - started
 
     def __str__(self):
-        ret = ''
-
-        for i, lineup in enumerate(self.best):
-            ret += 'Lineup {}\n'.format(i + 1)
-            ret += '=' * 100 + '\n'
-
-            lineup_actual_score = 0
-            lineup_actual_mins = 0
-            lineup_avg_mins = 0
-
-            table = Texttable(max_width=130)
-            table.set_deco(Texttable.HEADER)
-            table.add_row(['Position', 'Starting', 'Name', 'Cost', 'Predicted', 'Actual', 'Mins', 'Avg Mins', 'PPM', 'AVG PPM'])
-
-            for position, player in lineup.genes.items():
-                if not hasattr(player, 'starting'):
-                    player.starting = ''
-                try:
-                    game_log = player.gamelog_set.get(game__date=self.date)
-                except:
-                    game_log = Foo()
-                    game_log.draft_king_points = 0
-                    game_log.minutes = 0
-                    game_log.points_per_min = 0
-                game_logs = player.game_logs_last_x_days(90)
-                table.add_row([
-                    position, str(player.starting), player.name, player.salary,
-                    player.expected_points, game_log.draft_king_points, game_log.minutes,
-                    player.average_minutes(game_logs=game_logs), game_log.points_per_min, player.average_ppm(game_logs=game_logs)
-                ])
-                lineup_actual_score += game_log.draft_king_points
-                lineup_actual_mins += game_log.minutes
-                lineup_avg_mins += player.average_minutes()
-
-            lineup.actual = lineup_actual_score
-            table.add_row([
-                'TOTAL', '', '', lineup.cost,
-                lineup.expected_points, lineup_actual_score, lineup_actual_mins,
-                lineup_avg_mins, '', ''
-            ])
-            ret += table.draw() + '\n'
-            ret += '=' * 100 + '\n'
-            ret += ', '.join(p.name for p in lineup.genes.values()) + '\n\n\n'
-        return ret
-
-
-class Foo(object):
-    pass
+        # Imported here so the optimizers can be used without loading the models
+        from basketball.utils.reports import LineupReport
+        return LineupReport(self.best, getattr(self, 'date', None)).render()
@@ -0,0 +1,53 @@
+"""
+Fitness levels that account for how the players' draftking points move together.
+
+Teammates share the ball and opponents share the pace of the game, so their draftking points are
+correlated. :class:`~basketball.utils.fitness.CovarianceScorer` uses a player by player covariance
+matrix (see :attr:`~basketball.utils.simulation.OutcomeSimulator.covariance`), computed once per slate,
+to score a lineup by its expected points and the variance of its points. The variance of a lineup is the
+quadratic form `x' C x` of its players' indicator vector `x`, which is just the sum of the covariance
+sub-matrix of its players.
+
+A scorer is given to an optimizer with :meth:`~basketball.utils.evolution.Evolve.set_scorer`.
+"""
+import numpy
+
+
+class CovarianceScorer(object):
+    """Scores lineups by `expected points + ceiling * std - variance_weight * variance`.
+
+    A positive `ceiling` prefers lineups that can score a lot (tournaments), a positive `variance_weight`
+    prefers lineups that score consistently (cash games). `ceiling=1.28` roughly scores a lineup by the
+    90th percentile of its points.
+    """
+
+    def __init__(self, pool, covariance, ceiling=0.0, variance_weight=0.0):
+        """
+        Args:
+            pool: the optimizer's :class:`~basketball.utils.pool.PlayerPool`
+            covariance: players x players covariance matrix, in the order of `pool.players`
+            ceiling: the weight of the standard deviation of the lineup's points
+            variance_weight: the weight of the variance of the lineup's points
+        """
+        self.ids = pool.ids
+        self.points = pool.points
+        self.covariance = numpy.asarray(covariance, dtype=numpy.float64)
+        self.ceiling = ceiling
+        self.variance_weight = variance_weight
+
+    def combine(self, points, variance):
+        return points + self.ceiling * numpy.sqrt(numpy.maximum(variance, 0)) - self.variance_weight * variance
+
+    def variance(self, lineup):
+        """The variance of a lineup's draftking points"""
+        row = [self.ids[player] for player in lineup.genes.values()]
+        return self.covariance[numpy.ix_(row, row)].sum()
+
+    def score(self, lineup):
+        """The fitness level of an `EvolvableLineup`"""
+        return float(self.combine(lineup.expected_points, self.variance(lineup)))
+
+    def score_rows(self, rows):
+        """The fitness level of every row of a matrix of player ids (see `ArrayGA`)"""
+        variance = self.covariance[rows[:, :, None], rows[:, None, :]].sum(axis=(1, 2))
+        return self.combine(self.points[rows].sum(axis=1), variance)
@@ -0,0 +1,48 @@
+"""
+Callbacks that record the metrics of every generation.
+
+Any callable can be added with :meth:`~basketball.utils.evolution.Evolve.add_callback`, it is called with the
+optimizer and a dictionary of metrics after every generation (see
+:meth:`~basketball.utils.evolution.Evolve.emit_metrics`).
+:class:`~basketball.utils.instrumentation.MetricsWriter` writes the metrics to a JSON lines file.
+"""
+import simplejson as json
+
+
+class MetricsWriter(object):
+    """Writes the metrics of every generation as a line of JSON."""
+
+    def __init__(self, path, every=1):
+        """
+        Args:
+            path: the file to write the metrics to
+            every: only write every `every`th generation, long runs can have a lot of generations
+        """
+        self.path = path
+        self.every = every
+        self.file = open(path, 'w')
+
+    def __call__(self, evolve, metrics):
+        if metrics['generation'] % self.every == 0:
+            self.file.write(json.dumps(dict(metrics, engine=type(evolve).__name__), sort_keys=True) + '\n')
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class MetricsHistory(object):
+    """Keeps the metrics of every generation in memory, e.g. to plot or to inspect them in a shell."""
+
+    def __init__(self):
+        self.history = []
+
+    def __call__(self, evolve, metrics):
+        self.history.append(metrics)
+
+    def __len__(self):
+        return len(self.history)
+
+    def column(self, name):
+        """The list of the values of one metric (e.g. `best_fitness`) of every generation"""
+        return [metrics[name] for metrics in self.history]
@@ -0,0 +1,351 @@
+"""
+Local search alternatives to the genetic algorithm in :mod:`~basketball.utils.evolution`.
+
+Instead of breeding a population, these engines improve a single
+:class:`~basketball.utils.evolution.EvolvableLineup` one swap at a time. A swap replaces the player of one
+slot with another player from that slot's candidates in the
+:class:`~basketball.utils.pool.PlayerPool`. The candidates are sorted by salary, so only the players
+that keep the lineup under the cap are ever looked at, and the lineup's running totals make every swap
+a constant time change.
+
+It contains 3 engines, all drop in replacements for :class:`~basketball.utils.evolution.Evolve`:
+
+ 1. :class:`~basketball.utils.local_search.SimulatedAnnealing` random swaps, worse lineups are accepted
+    with a probability that decreases over the run.
+ 2. :class:`~basketball.utils.local_search.TabuSearch` always makes the best swap, the players that were
+    swapped out can't come back for a while.
+ 3. :class:`~basketball.utils.local_search.HillClimber` makes the best 1-swap or 2-swap until there is none
+    that improves the lineup, restarting from random lineups. It can also polish the `best` of any engine.
+
+"""
+import math
+
+from basketball.constants import SALARY_CAP
+from basketball.utils.evolution import Evolve, StopCriteria
+
+
+class LocalSearch(Evolve):
+    """Base class of the engines that improve a lineup one swap at a time.
+
+    Subclasses implement `step()`, `run()` calls it until the engine has evaluated as many lineups as
+    `Evolve.run()` would breed with the same arguments.
+    """
+
+    PATIENCE_UNIT = 'steps'
+
+    def __init__(self, gene_pool, seed=None, cache_size=None):
+        """
+        Args:
+            gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+            seed: seed of `self.random`, for reproducible runs
+            cache_size: the number of lineups `self.fitness_cache` remembers, no cache by default
+
+        Note:
+            `self.current` the lineup being improved
+            `self.evaluation_limit` the number of evaluations the swaps stop at during `run()`, None otherwise
+        """
+        super(LocalSearch, self).__init__(gene_pool, seed=seed, cache_size=cache_size)
+        self.current = None
+        self.n_best = 5
+        self.progress = 0
+        self.evaluation_limit = None
+
+    def run(self, n=1000, n_best=5, n_children=4, stop=None):
+        """Runs the search until `n` * `n_children` lineups are evaluated.
+
+        Args:
+            n: the number of `Evolve` generations worth of lineups to evaluate
+            n_best: the number of lineups to keep in `self.best`
+            n_children: the number of children `Evolve` would breed each generation
+            stop: optional :class:`~basketball.utils.evolution.StopCriteria`, checked after every `step()`
+
+        Returns:
+            The reason the search stopped (also assigned to `self.stop_reason`)
+        """
+        budget = n * n_children
+        self.n_best = n_best
+
+        if stop is not None:
+            stop.start()
+        self.stop_reason = StopCriteria.COMPLETED
+        self.start_metrics()
+
+        bar = self.progress_bar(budget)
+        started = self.evaluations
+        self.evaluation_limit = started + budget
+        iteration = 0
+
+        while not self.exhausted():
+            self.progress = (self.evaluations - started) / float(budget)
+            self.step()
+            iteration += 1
+            self.update_progress(
+                bar, min(budget, self.evaluations - started), self.best[0].fitness_level() if self.best else None)
+
+            if self.callbacks:
+                self.emit_metrics(
+                    iteration,
+                    self.best[0].fitness_level() if self.best else None,
+                    self.current.fitness_level() if self.current is not None else None)
+
+            if stop is not None:
+                reason = stop.check(b.fitness_level() for b in self.best)
+                if reason:
+                    self.stop_reason = reason
+                    break
+
+        self.evaluation_limit = None
+        return self.stop_reason
+
+    def exhausted(self):
+        """Whether `run()` has evaluated its budget of lineups, the swaps check it as they go"""
+        return self.evaluation_limit is not None and self.evaluations >= self.evaluation_limit
+
+    def step(self):
+        """Makes one or more swaps to `self.current`"""
+        raise NotImplementedError
+
+    def exclude(self, expressions):
+        """Removes players from the gene pool, starting over if the current lineup has one of them."""
+        expressions = set(expressions)
+        super(LocalSearch, self).exclude(expressions)
+        if self.current is not None and any(e in self.current for e in expressions):
+            self.current = None
+
+    def starting_lineup(self):
+        """A lineup to start searching from, the warm start lineups first (see `warm_start()`) then random ones."""
+        if self.population:
+            return self.copy(self.population.pop())
+        return self.generate_random_parent()
+
+    def copy(self, lineup):
+        return self.new_lineup(dict(lineup.genes))
+
+    def archive(self, lineup):
+        """Adds a copy of `lineup` to `self.best` if it's good enough"""
+        if len(self.best) < self.n_best or lineup.fitness_level() > self.best[-1].fitness_level():
+            population = self.population
+            self.population = [self.copy(lineup)]
+            self.set_best(n_best=self.n_best)
+            self.population = population
+
+    def budget(self, lineup, *slots):
+        """The most that can be spent on the players of `slots`, keeping `lineup` under the cap"""
+        return SALARY_CAP - lineup.cost + sum(lineup.genes[slot].salary for slot in slots)
+
+    def swap(self, lineup, slot, player):
+        """Puts `player` in `slot` and returns the fitness of the lineup, put the replaced player back to undo it"""
+        lineup.set_gene(slot, player)
+        self.evaluations += 1
+        return lineup.fitness_level()
+
+    def swaps(self, lineup):
+        """Every (slot, player) that can replace one player of `lineup` and keep it under the cap"""
+        for slot in self.pool.slots:
+            for player in self.pool.affordable(slot, self.budget(lineup, slot)):
+                if player not in lineup:
+                    yield slot, player
+
+    def best_swap(self, lineup, allowed=None):
+        """Finds the 1-swap that results in the fittest lineup.
+
+        Args:
+            lineup: the lineup to swap a player of, it's left unchanged
+            allowed: optional function of (slot, player, fitness) that returns whether the swap can be made
+
+        Returns:
+            tuple of (fitness, slot, player) or None if there is no swap
+        """
+        best = None
+        for slot, player in list(self.swaps(lineup)):
+            if self.exhausted():
+                break
+            replaced = lineup.genes[slot]
+            fitness = self.swap(lineup, slot, player)
+            lineup.set_gene(slot, replaced)
+            if (best is None or fitness > best[0]) and (allowed is None or allowed(slot, player, fitness)):
+                best = (fitness, slot, player)
+        return best
+
+
+class SimulatedAnnealing(LocalSearch):
+    """Makes random swaps, always keeping the better lineups and sometimes the worse ones.
+
+    A swap that loses `delta` points is kept with a probability of `exp(-delta / temperature)`.
+    The temperature cools down from `t_start` to `t_end` over the run, so the search wanders at first and
+    then settles on the best lineups it can find.
+    """
+
+    PATIENCE_UNIT = 'rounds of swaps'
+
+    def __init__(self, gene_pool, t_start=10.0, t_end=0.05, steps=100, seed=None, cache_size=None):
+        """
+        Args:
+            gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+            t_start: the temperature (in points) at the start of the run
+            t_end: the temperature at the end of the run
+            steps: the number of swaps each `step()` tries
+            seed: seed of `self.random`, for reproducible runs
+            cache_size: the number of lineups `self.fitness_cache` remembers, no cache by default
+        """
+        super(SimulatedAnnealing, self).__init__(gene_pool, seed=seed, cache_size=cache_size)
+        self.t_start = t_start
+        self.t_end = t_end
+        self.steps = steps
+
+    @property
+    def temperature(self):
+        return self.t_start * (self.t_end / self.t_start) ** self.progress
+
+    def step(self):
+        if self.current is None:
+            self.current = self.starting_lineup()
+            self.archive(self.current)
+
+        temperature = self.temperature
+        for _ in range(self.steps):
+            if self.exhausted():
+                break
+            slot = self.random.choice(self.pool.slots)
+            replaced = self.current.genes[slot]
+            player = self.pool.sample(slot, max_salary=self.budget(self.current, slot), used=self.current)
+            if player is None:
+                continue
+
+            fitness = self.current.fitness_level()
+            delta = self.swap(self.current, slot, player) - fitness
+            if delta >= 0 or self.random.random() < math.exp(delta / temperature):
+                if delta > 0:
+                    self.archive(self.current)
+            else:
+                self.current.set_gene(slot, replaced)
+                self.rejected += 1
+
+
+class TabuSearch(LocalSearch):
+    """Always makes the best swap, even if it makes the lineup worse.
+
+    The players that are swapped out become "tabu" for `tenure` steps, they can only come back if that
+    results in the best lineup found so far. This stops the search from going back and forth between
+    the same lineups.
+    """
+
+    PATIENCE_UNIT = 'swaps'
+
+    def __init__(self, gene_pool, tenure=25, seed=None, cache_size=None):
+        """
+        Args:
+            gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+            tenure: the number of steps a player that was swapped out can't come back
+            seed: seed of `self.random`, for reproducible runs
+            cache_size: the number of lineups `self.fitness_cache` remembers, no cache by default
+        """
+        super(TabuSearch, self).__init__(gene_pool, seed=seed, cache_size=cache_size)
+        self.tenure = tenure
+        self.tabu = {}
+        self.iteration = 0
+
+    def step(self):
+        if self.current is None:
+            self.current = self.starting_lineup()
+            self.archive(self.current)
+
+        self.iteration += 1
+        best_fitness = self.best[0].fitness_level() if self.best else None
+
+        def allowed(slot, player, fitness):
+            return self.tabu.get(player, 0) < self.iteration or (best_fitness is not None and fitness > best_fitness)
+
+        move = self.best_swap(self.current, allowed)
+        if move is None:
+            # Every swap is tabu, start over somewhere else
+            self.current = None
+            self.tabu = {}
+            return
+
+        _, slot, player = move
+        self.tabu[self.current.genes[slot]] = self.iteration + self.tenure
+        self.current.set_gene(slot, player)
+        self.archive(self.current)
+
+
+class HillClimber(LocalSearch):
+    """Makes the swap that improves the lineup the most until no swap of 1 or 2 players improves it.
+
+    `run()` climbs from random lineups (or the seeded ones), `polish()` climbs from any lineup.
+    """
+
+    PATIENCE_UNIT = 'climbs'
+
+    def __init__(self, gene_pool, two_swap=True, seed=None, cache_size=None):
+        """
+        Args:
+            gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+            two_swap: whether to also try swapping 2 players when no single swap improves the lineup
+            seed: seed of `self.random`, for reproducible runs
+            cache_size: the number of lineups `self.fitness_cache` remembers, no cache by default
+        """
+        super(HillClimber, self).__init__(gene_pool, seed=seed, cache_size=cache_size)
+        self.two_swap = two_swap
+
+    def step(self):
+        self.current = self.polish(self.starting_lineup())
+
+    def polish(self, lineup):
+        """Climbs from `lineup` to a lineup that no 1-swap (or 2-swap) improves.
+
+        Args:
+            lineup: an `EvolvableLineup`, it's left unchanged
+
+        Returns:
+            the improved copy of `lineup`, it can stop climbing early when `run()` runs out of evaluations
+        """
+        lineup = self.copy(lineup)
+        while not self.exhausted():
+            move = self.best_swap(lineup)
+            if move is not None and move[0] > lineup.fitness_level():
+                _, slot, player = move
+                lineup.set_gene(slot, player)
+            elif not (self.two_swap and self.improve_two(lineup)):
+                return lineup
+            self.archive(lineup)
+        return lineup
+
+    def improve_two(self, lineup):
+        """Makes the first 2-swap that improves `lineup` (in place).
+
+        Returns:
+            whether an improving 2-swap was found, False as soon as `run()` runs out of evaluations
+        """
+        fitness = lineup.fitness_level()
+        slots = self.pool.slots
+        for i, first in enumerate(slots):
+            for second in slots[i + 1:]:
+                replaced = lineup.genes[first], lineup.genes[second]
+                budget = self.budget(lineup, first, second)
+                cheapest = self.pool.affordable(second, budget)
+                if not cheapest:
+                    continue
+
+                for player in self.pool.affordable(first, budget - cheapest[0].salary):
+                    if player in lineup:
+                        continue
+                    for other in self.pool.affordable(second, budget - player.salary):
+                        if self.exhausted():
+                            return False
+                        if other in lineup or other is player:
+                            continue
+                        lineup.set_gene(first, player)
+                        if self.swap(lineup, second, other) > fitness:
+                            return True
+                        lineup.set_gene(first, replaced[0])
+                        lineup.set_gene(second, replaced[1])
+        return False
+
+    def polish_all(self, lineups):
+        """Polishes every lineup, returning the unique polished lineups fittest first"""
+        polished = {}
+        for lineup in lineups:
+            lineup = self.polish(lineup)
+            polished.setdefault(lineup.unique(), lineup)
+        return sorted(polished.values(), key=lambda k: k.fitness_level(), reverse=True)
@@ -0,0 +1,329 @@
+"""
+Exact lineup optimizer.
+
+Picking a lineup is a 0-1 program:
+
+ - every slot is filled by exactly one eligible player
+ - every player is used at most once
+ - the lineup's salary is under the cap
+
+The objective is to maximize the expected points. On its own the program is solved exactly by dynamic
+programming over the players, the state being the slots filled so far and the salary spent, see
+:func:`~basketball.utils.milp.best_lineup`. The next best lineups are found with "exclusion cuts" that forbid
+every lineup found so far. The cuts are enforced with branch and bound: a lineup that breaks a cut is split
+into sub-programs that force in, or leave out, its players.
+
+Without the integrality (players can be picked "partially") the program is a linear program that is quick
+to solve, its optimum is an upper bound of the expected points of any lineup, see
+:func:`~basketball.utils.milp.upper_bound`.
+"""
+import heapq
+import itertools
+import time
+
+import numpy
+from scipy import sparse
+from scipy.optimize import linprog
+
+from basketball.constants import SALARY_CAP
+from basketball.utils.evolution import Evolve
+
+# The dynamic program has a column for every salary unit (e.g. $100) under the cap
+MAX_SALARY_UNITS = 5000
+
+
+def lineup_program(pool, salary_cap=SALARY_CAP):
+    """The variables and the constraints every legal lineup of a pool must satisfy, in the form of `linprog()`.
+
+    There is a variable for every (slot, eligible player) pair.
+
+    Args:
+        pool: a :class:`~basketball.utils.pool.PlayerPool`
+        salary_cap: lineups cannot cost more than this
+
+    Returns:
+        tuple of (the slot column of each variable, the player id of each variable, A_ub, b_ub, A_eq, b_eq)
+    """
+    variable_slots = numpy.concatenate([
+        numpy.full(len(candidates), column, dtype=numpy.int64)
+        for column, candidates in enumerate(pool.slot_candidates)])
+    variable_players = numpy.concatenate(pool.slot_candidates)
+
+    columns = numpy.arange(len(variable_players))
+    ones = numpy.ones(len(variable_players))
+    one_player_per_slot = sparse.csr_matrix(
+        (ones, (variable_slots, columns)),
+        shape=(len(pool.slots), len(variable_players)))
+    one_slot_per_player = sparse.csr_matrix(
+        (ones, (variable_players, columns)),
+        shape=(len(pool), len(variable_players)))
+    # In thousands, the solver struggles with coefficients that are orders of magnitude apart
+    salary = sparse.csr_matrix(pool.salaries[variable_players].reshape(1, -1) / 1000.0)
+
+    A_ub = sparse.vstack([one_slot_per_player, salary]).tocsr()
+    b_ub = numpy.append(numpy.ones(len(pool)), salary_cap / 1000.0)
+    return variable_slots, variable_players, A_ub, b_ub, one_player_per_slot, numpy.ones(len(pool.slots))
+
+
+def upper_bound(pool, salary_cap=SALARY_CAP):
+    """The optimum of the continuous relaxation of the lineup program, solved with `linprog()`.
+
+    No lineup of the pool can be expected to score more than this (up to the solver's tolerance).
+
+    Args:
+        pool: a :class:`~basketball.utils.pool.PlayerPool`
+        salary_cap: lineups cannot cost more than this
+
+    Returns:
+        the upper bound, or None if the pool has no legal lineup
+    """
+    _, variable_players, A_ub, b_ub, A_eq, b_eq = lineup_program(pool, salary_cap)
+    if any(not len(candidates) for candidates in pool.slot_candidates):
+        return None
+    result = linprog(
+        -pool.points[variable_players], A_ub, b_ub, A_eq, b_eq,
+        bounds=(0, 1), method='interior-point', options={'sparse': True})
+    return -result.fun if result.status == 0 else None
+
+
+def slot_masks(pool, required=(), forbidden=()):
+    """The slots each player can be used in by `best_lineup()`, the players that are dominated are left out.
+
+    A player is dominated in a slot if at least as many other players as there are slots (none of them forbidden)
+    cost at most as much and are expected to score more (or the same for less), see
+    :mod:`~basketball.utils.pruning`. One of them is always free to replace the player, so leaving the player
+    out of the slot doesn't change the best lineup's expected points.
+
+    Returns:
+        vector of bitmasks, bit `i` is set if the player can be used in `pool.slots[i]`
+    """
+    masks = pool.slot_masks.copy()
+    if forbidden:
+        masks[list(forbidden)] = 0
+    for slot, candidates in enumerate(pool.slot_candidates):
+        candidates = candidates[masks[candidates] > 0]
+        salaries = pool.salaries[candidates]
+        points = pool.points[candidates]
+        dominates = (salaries[:, None] <= salaries[None, :]) & (
+            (points[:, None] > points[None, :]) |
+            ((points[:, None] == points[None, :]) & (salaries[:, None] < salaries[None, :])))
+        dominated = candidates[dominates.sum(axis=0) >= len(pool.slots)]
+        dominated = [player for player in dominated.tolist() if player not in required]
+        masks[dominated] &= ~(1 << slot)
+    return masks
+
+
+def best_lineup(pool, salary_cap=SALARY_CAP, required=(), forbidden=()):
+    """The lineup with the most expected points, by dynamic programming.
+
+    The players are added one at a time, keeping the most points of every (filled slots, salary spent) state.
+    The salaries are counted in their greatest common divisor (usually $100), so the table stays small, and
+    the dominated players are left out, see `slot_masks()`.
+
+    Args:
+        pool: a :class:`~basketball.utils.pool.PlayerPool`
+        salary_cap: lineups cannot cost more than this
+        required: ids of the players that must be in the lineup
+        forbidden: ids of the players that can't be in the lineup
+
+    Raises:
+        ValueError: if the salaries don't have a common unit that keeps the table small enough
+
+    Returns:
+        tuple of (expected points, row of player ids) or None if there is no legal lineup
+    """
+    n_slots = len(pool.slots)
+    full = (1 << n_slots) - 1
+    unit = int(numpy.gcd.reduce(numpy.append(pool.salaries, salary_cap)))
+    width = salary_cap // unit
+    if width > MAX_SALARY_UNITS:
+        raise ValueError('The salaries need a common unit (e.g. $100) to be solved exactly.')
+    weights = (pool.salaries // unit).tolist()
+
+    # With an axis for every slot (filled or not), the states with and without a slot are slices of the table
+    shape = (2,) * n_slots + (width + 1,)
+
+    def states(slot, filled, salaries):
+        index = [slice(None)] * n_slots + [salaries]
+        index[n_slots - 1 - slot] = filled
+        return tuple(index)
+
+    masks = slot_masks(pool, required, forbidden).tolist()
+    points = numpy.full(shape, -numpy.inf)
+    points[(0,) * n_slots + (0,)] = 0
+    players = [i for i in range(len(pool)) if masks[i]]
+    choices = []
+    for i in players:
+        weight = weights[i]
+        added = points.copy() if i not in required else numpy.full_like(points, -numpy.inf)
+        choice = numpy.full(shape, -1, dtype=numpy.int8)
+        if weight <= width:
+            for slot in range(n_slots):
+                if not masks[i] & (1 << slot):
+                    continue
+                candidate = points[states(slot, 0, slice(0, width + 1 - weight))] + pool.points[i]
+                after = states(slot, 1, slice(weight, None))
+                better = candidate > added[after]
+                numpy.copyto(added[after], candidate, where=better)
+                numpy.copyto(choice[after], slot, where=better)
+        points = added
+        choices.append(choice)
+
+    points = points.reshape(full + 1, width + 1)
+    choices = [choice.reshape(full + 1, width + 1) for choice in choices]
+    spent = int(numpy.argmax(points[full]))
+    if points[full, spent] == -numpy.inf:
+        return None
+
+    # Walk back through the choices of the best final state
+    row = numpy.empty(n_slots, dtype=numpy.int64)
+    filled = full
+    for i, choice in zip(reversed(players), reversed(choices)):
+        slot = choice[filled, spent]
+        if slot >= 0:
+            row[slot] = i
+            filled ^= 1 << slot
+            spent -= weights[i]
+    return float(pool.points[row].sum()), row
+
+
+def breaks(cut, row):
+    """Whether or not the lineup `row` breaks an exclusion cut (it shares too many players)"""
+    players, max_shared = cut
+    return sum(1 for player in row if player in players) > max_shared
+
+
+class MILPOptimizer(Evolve):
+    """Finds the provably best lineups of a gene pool.
+
+    Can be used in place of :class:`~basketball.utils.evolution.Evolve`, after `run()` `self.best`
+    is a list of :class:`~basketball.utils.evolution.EvolvableLineup` ordered best first.
+
+    The objective is linear, so a `scorer` (see `set_scorer()`) only changes the lineups' fitness level,
+    the lineups are still the ones with the most expected points.
+    """
+
+    OPTIMAL = 'found the optimal lineups'
+    EXHAUSTED = 'no more legal lineups'
+
+    # `run()` always finds the best lineups, it doesn't stop early
+    PATIENCE_UNIT = None
+
+    def __init__(self, gene_pool, salary_cap=SALARY_CAP, seed=None):
+        """
+        Args:
+            gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+            salary_cap: lineups cannot cost more than this
+            seed: only used to repair the `warm_start()` lineups, the solver itself is deterministic
+
+        Note:
+            `self.evaluations` counts the number of times a (sub-)program was solved
+            the `callbacks` are called after every lineup that is found, rather than every generation
+        """
+        super(MILPOptimizer, self).__init__(gene_pool, seed=seed)
+        self.salary_cap = salary_cap
+        self.avoid_cuts = []
+        self._ties = itertools.count()
+
+    def exclusion_cut(self, row, min_distance=1):
+        """A constraint that forbids lineups sharing more than `len(row) - min_distance` players with `row`.
+
+        With the default `min_distance` it only forbids the lineup `row` (in any order of its slots).
+
+        Returns:
+            tuple of (set of player ids, the most of them a lineup can have)
+        """
+        return frozenset(row.tolist()), len(row) - min_distance
+
+    def solve(self, required=frozenset(), forbidden=frozenset()):
+        """Solves the sub-program of the lineups that have every `required` player and none of `forbidden`.
+
+        Returns:
+            a node of the branch and bound, (-expected points, tie breaker, required, forbidden, row of player ids),
+            or None if there is no legal lineup.
+        """
+        started = time.time()
+        self.evaluations += 1
+        solution = best_lineup(self.pool, self.salary_cap, required, forbidden)
+        self.timings['solve'] += time.time() - started
+        if solution is None:
+            return None
+        points, row = solution
+        return -points, next(self._ties), required, forbidden, row
+
+    def branch(self, node, cut):
+        """Splits a node whose lineup breaks `cut` into the sub-programs of its lineups that might not.
+
+        Every such lineup leaves out at least one of the lineup's players that the cut counts: the first one,
+        or has the first one and leaves out the second one, etc.
+
+        Returns:
+            list of the nodes of the sub-programs that have a legal lineup
+        """
+        _, _, required, forbidden, row = node
+        players, _ = cut
+        shared = [player for player in row.tolist() if player in players and player not in required]
+        children = []
+        for i, player in enumerate(shared):
+            child = self.solve(required | frozenset(shared[:i]), forbidden | frozenset([player]))
+            if child is not None:
+                children.append(child)
+        return children
+
+    def exclude(self, expressions):
+        """Forbids some players from being used in any lineup.
+
+        Args:
+            expressions: iterable of players that can no longer be used
+        """
+        expressions = set(expressions)
+        self.pool.exclude(expressions)
+        self.bound = None
+        self.best = [b for b in self.best if not any(p in b for p in expressions)]
+
+    def avoid(self, evolvables, min_distance=1):
+        """Forbids lineups that don't have at least `min_distance` players that aren't in each of `evolvables`"""
+        super(MILPOptimizer, self).avoid(evolvables, min_distance=min_distance)
+        self.avoid_cuts = [self.exclusion_cut(self.pool.row(e.genes), min_distance) for e in self.avoided]
+
+    def run(self, n=None, n_best=5, n_children=None, stop=None):
+        """Finds the `n_best` distinct lineups with the most expected points.
+
+        The nodes are solved best first, so the first lineup that breaks none of the cuts is the best one left.
+        Its node stays in the queue, it's split by the lineup's own exclusion cut to find the next one.
+
+        Args:
+            n: ignored, accepted so `MILPOptimizer` can be used in place of `Evolve`
+            n_best: the number of lineups to find
+            n_children: ignored, accepted so `MILPOptimizer` can be used in place of `Evolve`
+            stop: ignored, accepted so `MILPOptimizer` can be used in place of `Evolve`
+
+        Returns:
+            The reason the optimizer stopped (also assigned to `self.stop_reason`)
+        """
+        cuts = list(self.avoid_cuts)
+        self.best = []
+        self.start_metrics()
+        root = self.solve()
+        queue = [root] if root is not None else []
+        while queue and len(self.best) < n_best:
+            node = heapq.heappop(queue)
+            cut = next((c for c in cuts if breaks(c, node[-1])), None)
+            if cut is not None:
+                for child in self.branch(node, cut):
+                    heapq.heappush(queue, child)
+                continue
+
+            row = node[-1]
+            cuts.append(self.exclusion_cut(row))
+            heapq.heappush(queue, node)
+            self.best.append(self.new_lineup(self.pool.genes(row)))
+
+            if self.callbacks:
+                self.emit_metrics(
+                    len(self.best),
+                    self.best[0].fitness_level(),
+                    sum(b.fitness_level() for b in self.best) / float(len(self.best)))
+
+        self.stop_reason = self.OPTIMAL if len(self.best) == n_best else self.EXHAUSTED
+        return self.stop_reason
@@ -0,0 +1,176 @@
+"""
+Multi-objective lineup optimization.
+
+Instead of ranking lineups on a single fitness level, :class:`~basketball.utils.pareto.ParetoEvolve` keeps
+the lineups that are not dominated on any of several objectives:
+
+ - `projection` the expected points
+ - `ceiling` the expected points plus `ceiling` standard deviations (roughly the 90th percentile),
+   using the covariance of the players' draftking points
+ - `salary_left` how much of the cap is left over
+
+A lineup dominates another when it is at least as good on every objective and better on one. The
+population is ranked with a fast non-dominated sort (NSGA-II) over the whole population matrix, so a
+single run produces the trade-offs for every contest type on a slate.
+"""
+import numpy
+
+from basketball.utils.vector_evolution import ArrayGA, VectorEvolve
+
+OBJECTIVES = ('projection', 'ceiling', 'salary_left')
+
+
+def non_dominated_sort(objectives, size=None):
+    """Ranks rows by their non-dominated front, every objective is maximized.
+
+    Args:
+        objectives: (rows x objectives) matrix
+        size: stop once at least this many rows are ranked, the other rows get the rank `len(objectives)`
+
+    Returns:
+        vector with the front of each row, 0 for the rows no other row dominates
+    """
+    n = len(objectives)
+    size = n if size is None else size
+
+    at_least_as_good = numpy.ones((n, n), dtype=bool)
+    better = numpy.zeros((n, n), dtype=bool)
+    for column in objectives.T:
+        at_least_as_good &= column[:, None] >= column[None, :]
+        better |= column[:, None] > column[None, :]
+    dominates = at_least_as_good & better
+
+    ranks = numpy.full(n, n, dtype=numpy.int64)
+    dominated_by = dominates.sum(axis=0)
+    remaining = numpy.ones(n, dtype=bool)
+    rank = 0
+    ranked = 0
+    while ranked < size and remaining.any():
+        front = remaining & (dominated_by == 0)
+        ranks[front] = rank
+        ranked += front.sum()
+        dominated_by -= dominates[front].sum(axis=0)
+        remaining &= ~front
+        rank += 1
+    return ranks
+
+
+def crowding_distance(objectives, ranks):
+    """How isolated each row is from the other rows of its front, the rows at the edges get `inf`.
+
+    Args:
+        objectives: (rows x objectives) matrix
+        ranks: the front of each row, see `non_dominated_sort()`
+    """
+    distance = numpy.zeros(len(objectives))
+    for rank in numpy.unique(ranks):
+        front = numpy.flatnonzero(ranks == rank)
+        if len(front) < 3:
+            distance[front] = numpy.inf
+            continue
+        for column in objectives[front].T:
+            order = numpy.argsort(column, kind='mergesort')
+            spread = column[order[-1]] - column[order[0]]
+            distance[front[order[0]]] = distance[front[order[-1]]] = numpy.inf
+            if spread > 0:
+                distance[front[order[1:-1]]] += (column[order[2:]] - column[order[:-2]]) / spread
+    return distance
+
+
+class ParetoGA(ArrayGA):
+    """:class:`~basketball.utils.vector_evolution.ArrayGA` that selects lineups with NSGA-II.
+
+    The population is ordered by front, then by crowding distance, so the parents are always the
+    non-dominated lineups that are the most different from each other.
+    """
+
+    def __init__(self, salaries, points, slot_candidates, covariance=None, ceiling=1.28, **kwargs):
+        """
+        Args:
+            salaries: vector of player salaries indexed by player id
+            points: vector of player expected points indexed by player id
+            slot_candidates: list with an array of eligible player ids for each slot (column)
+            covariance: players x players covariance matrix of draftking points, without it the ceiling
+                is the same as the projection
+            ceiling: the number of standard deviations added to the projection for the ceiling
+            **kwargs: passed to `ArrayGA`
+        """
+        super(ParetoGA, self).__init__(salaries, points, slot_candidates, **kwargs)
+        self.covariance = covariance
+        self.ceiling = ceiling
+
+    def objectives(self, rows):
+        """(rows x `OBJECTIVES`) matrix of the objectives of each lineup"""
+        projection = self.points[rows].sum(axis=1)
+        ceiling = projection
+        if self.covariance is not None:
+            variance = self.covariance[rows[:, :, None], rows[:, None, :]].sum(axis=(1, 2))
+            ceiling = projection + self.ceiling * numpy.sqrt(numpy.maximum(variance, 0))
+        salary_left = self.salary_cap - self.salaries[rows].sum(axis=1)
+        return numpy.column_stack((projection, ceiling, salary_left))
+
+    def select(self, rows, fitness, size):
+        """Returns the `size` best unique lineups that can survive (and their fitness), best first.
+
+        Lineups are ranked by their non-dominated front, ties are broken by crowding distance.
+        """
+        alive = numpy.isfinite(fitness)
+        rows, fitness = rows[alive], fitness[alive]
+        _, unique = numpy.unique(self.unique(rows), return_index=True)
+        rows, fitness = rows[unique], fitness[unique]
+
+        objectives = self.objectives(rows)
+        ranks = non_dominated_sort(objectives, size)
+        order = numpy.lexsort((-crowding_distance(objectives, ranks), ranks))[:size]
+        return rows[order], fitness[order]
+
+
+class ParetoEvolve(VectorEvolve):
+    """:class:`~basketball.utils.vector_evolution.VectorEvolve` that keeps the non-dominated lineups.
+
+    After `run()`, `self.front` is the list of non-dominated :class:`~basketball.utils.evolution.EvolvableLineup`,
+    each with an `objectives` dictionary, and `self.best` are the ones with the best projection.
+    Use `best_by()` to pick lineups for other contest types.
+    """
+
+    def __init__(self, gene_pool, covariance=None, ceiling=1.28, population_size=2048, seed=None):
+        """
+        Args:
+            gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+            covariance: players x players covariance matrix of draftking points, in the order of `pool.players`,
+                see `set_covariance()`
+            ceiling: the number of standard deviations added to the projection for the ceiling
+            population_size: number of lineups in each generation.
+            seed: seed for the random number generator
+        """
+        super(ParetoEvolve, self).__init__(gene_pool, population_size=population_size, seed=seed)
+        self.engine = ParetoGA(
+            self.pool.salaries, self.pool.points, self.pool.slot_candidates,
+            covariance=covariance, ceiling=ceiling, n_parents=self.engine.n_parents, seed=seed)
+        self.front = []
+
+    def set_covariance(self, covariance):
+        """Sets the covariance matrix used for the ceiling objective"""
+        self.engine.covariance = covariance
+        if len(self.population):
+            self.population, self.fitness = self.engine.rescore(self.population)
+
+    def run(self, n=1000, n_best=5, n_children=4, stop=None):
+        """Runs the evolution, see `VectorEvolve.run()`, and updates `self.front`"""
+        super(ParetoEvolve, self).run(n, n_best=n_best, n_children=n_children, stop=stop)
+
+        objectives = self.engine.objectives(self.population)
+        ranks = non_dominated_sort(objectives)
+        self.front = []
+        for row, values in zip(self.population[ranks == 0], objectives[ranks == 0]):
+            lineup = self.new_lineup(self.pool.genes(row))
+            lineup.objectives = dict(zip(OBJECTIVES, values.tolist()))
+            if self.is_new(lineup):
+                self.front.append(lineup)
+
+        self.best = self.best_by('projection', n_best)
+        return self.stop_reason
+
+    def best_by(self, objective, n=5):
+        """The `n` lineups of the front that are the best on one of `OBJECTIVES`"""
+        return sorted(self.front, key=lambda k: k.objectives[objective], reverse=True)[:n]
@@ -0,0 +1,156 @@
+"""
+Array backed representation of a pool of players.
+
+The optimizers in :mod:`~basketball.utils.evolution` work with a `gene_pool`, a dictionary
+mapping each roster slot to the list of players eligible for it.
+:class:`~basketball.utils.pool.PlayerPool` flattens that dictionary into dense integer ids and
+contiguous NumPy vectors so lineups can be represented as rows of player ids.
+
+It also indexes which slots each player is eligible for, and every slot's players sorted by salary,
+so the optimizers can directly sample a player that is eligible, unused and affordable.
+"""
+import random
+from bisect import bisect_right
+
+import numpy
+
+from basketball.constants import ROSTER_SLOTS
+
+
+def map_players_to_positions(players):
+    """Builds a `gene_pool` from players, a dictionary of roster slot -> the players eligible for it.
+
+    Args:
+        players: iterable of players with a `position` attribute (a set of positions, e.g. {'PG', 'SG'})
+    """
+    positioned_players = {slot: [] for slot, _ in ROSTER_SLOTS}
+    for player in players:
+        for slot, positions in ROSTER_SLOTS:
+            if positions is None or player.position & positions:
+                positioned_players[slot].append(player)
+    return positioned_players
+
+
+class PlayerPool(object):
+    """Dense view of a `gene_pool`.
+
+    Every distinct player in the gene pool is given an integer id (its index into `self.players`).
+    A lineup can then be stored as a row of ids, one column per slot in `self.slots`.
+
+    Note:
+        `self.slot_masks` the slots each player is eligible for, bit `i` is set for `self.slots[i]`
+        `self.by_salary` each slot's player ids, cheapest first
+        `self.min_salary` the salary of each slot's cheapest player (0 if it has none)
+    """
+
+    def __init__(self, gene_pool, rnd=None):
+        """
+        Args:
+            gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+            rnd: the `random.Random` that `sample()` draws from, e.g. the one of an `Evolve`
+        """
+        self.random = rnd if rnd is not None else random.Random()
+        self.slots = sorted(gene_pool.keys())
+        self.players = []
+        self.ids = {}
+
+        for slot in self.slots:
+            for player in gene_pool[slot]:
+                if player not in self.ids:
+                    self.ids[player] = len(self.players)
+                    self.players.append(player)
+
+        self.salaries = numpy.array([p.salary for p in self.players], dtype=numpy.int64)
+        self.points = numpy.array([p.expected_points for p in self.players], dtype=numpy.float64)
+        self.slot_candidates = [
+            numpy.array([self.ids[p] for p in gene_pool[slot]], dtype=numpy.int64)
+            for slot in self.slots]
+
+        self.slot_masks = numpy.zeros(len(self.players), dtype=numpy.int64)
+        for i, candidates in enumerate(self.slot_candidates):
+            self.slot_masks[candidates] |= 1 << i
+
+        self.index_slots()
+
+    def index_slots(self):
+        """(Re)builds the per slot sorted indexes from `self.slot_candidates`."""
+        self.by_salary = {}
+        self._sorted_players = {}
+        self._sorted_salaries = {}
+        self.min_salary = {}
+
+        for slot, candidates in zip(self.slots, self.slot_candidates):
+            self.by_salary[slot] = candidates[numpy.argsort(self.salaries[candidates], kind='mergesort')]
+            # plain lists are a lot faster than arrays for picking single players
+            self._sorted_players[slot] = [self.players[i] for i in self.by_salary[slot]]
+            self._sorted_salaries[slot] = self.salaries[self.by_salary[slot]].tolist()
+            self.min_salary[slot] = self._sorted_salaries[slot][0] if self._sorted_salaries[slot] else 0
+
+    def eligible(self, player, slot):
+        """Whether or not `player` can be used in `slot`"""
+        return bool(self.slot_masks[self.ids[player]] & (1 << self.slots.index(slot)))
+
+    def sample(self, slot, max_salary=None, used=()):
+        """Picks a random player for a slot.
+
+        Args:
+            slot: the roster slot
+            max_salary: only pick players that cost at most this much
+            used: container of players that can't be picked (e.g. the lineup being filled)
+
+        Returns:
+            a player that is eligible for `slot`, not in `used` and affordable, or None if there isn't one.
+        """
+        players = self._sorted_players[slot]
+        if max_salary is None:
+            affordable = len(players)
+        else:
+            affordable = bisect_right(self._sorted_salaries[slot], max_salary)
+
+        # Most of the time only a few players are used, so guessing is faster than filtering
+        for _ in range(8):
+            if not affordable:
+                return None
+            player = players[self.random.randrange(affordable)]
+            if player not in used:
+                return player
+
+        unused = [p for p in players[:affordable] if p not in used]
+        return self.random.choice(unused) if unused else None
+
+    def affordable(self, slot, max_salary=None):
+        """The players eligible for `slot` that cost at most `max_salary`, cheapest first"""
+        players = self._sorted_players[slot]
+        if max_salary is None:
+            return players
+        return players[:bisect_right(self._sorted_salaries[slot], max_salary)]
+
+    def min_cost(self, slots):
+        """The least the players of `slots` can cost.
+
+        It's a lower bound, the same cheap player might be the cheapest of several slots.
+        """
+        return sum(self.min_salary[slot] for slot in slots)
+
+    def exclude(self, players):
+        """Removes players from every slot, their ids stay the same."""
+        player_ids = [self.ids[p] for p in players if p in self.ids]
+        self.slot_candidates = [
+            candidates[~numpy.isin(candidates, player_ids)] for candidates in self.slot_candidates]
+        self.slot_masks[player_ids] = 0
+        self.index_slots()
+
+    def __len__(self):
+        return len(self.players)
+
+    def genes(self, row):
+        """Converts a row of player ids into a dictionary of slot -> player
+
+        Args:
+            row: sequence of player ids, one for each slot in `self.slots`
+        """
+        return {slot: self.players[player_id] for slot, player_id in zip(self.slots, row)}
+
+    def row(self, genes):
+        """The inverse of `genes()`, returns a NumPy row of player ids."""
+        return numpy.array([self.ids[genes[slot]] for slot in self.slots], dtype=numpy.int64)
@@ -0,0 +1,97 @@
+"""
+Builds a portfolio of lineups for multi-entry contests.
+
+A :class:`~basketball.utils.portfolio.Portfolio` keeps running an optimizer
+(:class:`~basketball.utils.evolution.Evolve` or any of its alternatives) and picks lineups from its best
+that are different enough from the lineups it already has. Players that reach their maximum exposure are
+excluded from the optimizer's gene pool, and the optimizer is told to avoid the picked lineups, so it
+keeps searching elsewhere. The optimizer's state (gene pool,
+population) is shared across the whole portfolio rather than starting from scratch for every lineup.
+"""
+from collections import Counter
+
+import numpy
+
+
+class Portfolio(object):
+    """A set of diverse lineups with per player exposure caps."""
+
+    def __init__(self, evolve, max_exposure=1.0, min_distance=1, archive_size=50):
+        """
+        Args:
+            evolve: the optimizer used to generate lineups (e.g. an `Evolve` instance)
+            max_exposure: the largest fraction of the lineups any one player can be in
+            min_distance: the minimum number of players any two lineups must not share
+            archive_size: the number of lineups the optimizer keeps in its `best` to pick from
+        """
+        self.evolve = evolve
+        self.max_exposure = max_exposure
+        self.min_distance = min_distance
+        self.archive_size = archive_size
+        self.lineups = []
+        self.exposure = Counter()
+
+    def max_lineups_per_player(self, n):
+        """The number of lineups (out of `n`) that a single player can be in"""
+        return max(1, int(self.max_exposure * n))
+
+    def accepts(self, lineup, n):
+        """Whether or not `lineup` can be added to the portfolio
+
+        Args:
+            lineup: an `EvolvableLineup`
+            n: the number of lineups the portfolio will have
+        """
+        cap = self.max_lineups_per_player(n)
+        if any(self.exposure[player] >= cap for player in lineup.genes.values()):
+            return False
+        return all(lineup.distance(other) >= self.min_distance for other in self.lineups)
+
+    def can_exclude(self, players):
+        """Whether or not every slot of the optimizer's gene pool still has a player without `players`"""
+        pool = self.evolve.pool
+        player_ids = [pool.ids[p] for p in players if p in pool.ids]
+        return all(len(numpy.setdiff1d(candidates, player_ids)) for candidates in pool.slot_candidates)
+
+    def add(self, lineup):
+        self.lineups.append(lineup)
+        self.exposure.update(lineup.genes.values())
+
+    def generate(self, n, generations=5000, max_stale=5):
+        """Generates the portfolio, yielding each lineup as soon as it is added.
+
+        Args:
+            n: the number of lineups to generate
+            generations: the number of generations the optimizer runs between picking lineups
+            max_stale: give up after this many runs in a row that don't add a lineup
+
+        Note:
+            The portfolio stops early, with the lineups it has, if the players that are maxed out are the only
+            ones left for a slot
+
+        Yields:
+            `EvolvableLineup`s, the best ones first
+        """
+        cap = self.max_lineups_per_player(n)
+        stale = 0
+
+        while len(self.lineups) < n and stale < max_stale:
+            self.evolve.run(generations, n_best=self.archive_size)
+
+            added = False
+            for lineup in self.evolve.best:
+                if len(self.lineups) >= n:
+                    break
+                if self.accepts(lineup, n):
+                    self.add(lineup)
+                    added = True
+                    yield lineup
+
+            stale = 0 if added else stale + 1
+
+            # Search elsewhere: drop the players that are maxed out and stay away from the picked lineups
+            maxed_out = [player for player, count in self.exposure.items() if count >= cap]
+            if not self.can_exclude(maxed_out):
+                return
+            self.evolve.exclude(maxed_out)
+            self.evolve.avoid(self.lineups, self.min_distance)
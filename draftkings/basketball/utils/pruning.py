@@ -0,0 +1,61 @@
+"""
+Removes players that can never be in an optimal lineup.
+
+A player is dominated in a roster slot by the other players of that slot that cost at most as much and
+are expected to score more (or the same for less). Replacing the dominated player with one of them never
+makes a lineup worse, as long as one of them isn't already used in the lineup. A lineup can use at most one
+dominator in each of the other slots they are eligible for, so if there are more dominators than those
+slots, one of them is always free and the dominated player can be removed from the slot.
+
+This only holds for a fitness level that is the sum of the expected points (the default), not for a
+:class:`~basketball.utils.fitness.CovarianceScorer`.
+"""
+
+
+def count_combinations(gene_pool):
+    """The number of possible combinations of players, the product of the number of players of every slot"""
+    combinations = 1
+    for players in gene_pool.values():
+        combinations *= len(players)
+    return combinations if combinations > 1 else 0
+
+
+def dominates(player, other):
+    """Whether `player` costs at most as much as `other` and is expected to score more (or the same for less)"""
+    if player.salary > other.salary:
+        return False
+    return (player.expected_points > other.expected_points or
+            (player.expected_points == other.expected_points and player.salary < other.salary))
+
+
+def prune_dominated(gene_pool):
+    """Removes the players that are dominated in each slot, see the module's documentation.
+
+    Args:
+        gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+
+    Returns:
+        tuple of (the pruned gene pool, dictionary of slot -> list of the players removed from it)
+    """
+    slots_of = {}
+    for slot, players in gene_pool.items():
+        for player in players:
+            slots_of.setdefault(player, set()).add(slot)
+
+    pruned = {}
+    removed = {}
+    for slot, players in gene_pool.items():
+        pruned[slot] = []
+        removed[slot] = []
+        for player in players:
+            dominators = [other for other in players if other is not player and dominates(other, player)]
+            other_slots = set()
+            for other in dominators:
+                other_slots |= slots_of[other]
+            other_slots.discard(slot)
+
+            if len(dominators) > len(other_slots):
+                removed[slot].append(player)
+            else:
+                pruned[slot].append(player)
+    return pruned, removed
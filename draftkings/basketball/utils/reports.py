@@ -0,0 +1,98 @@
+"""
+Renders the tables printed for the best lineups of a run.
+
+:class:`~basketball.utils.reports.LineupReport` gets the actual results and the recent averages of every
+player in the lineups with one query each, then renders all the tables in memory.
+"""
+from datetime import timedelta
+
+from texttable import Texttable
+
+from basketball.models import GameLog, Player
+
+
+class PlayerResult(object):
+    """A player's actual game and recent averages, with zeros for whatever is missing."""
+
+    def __init__(self, draft_king_points=0, minutes=0, points_per_min=0):
+        self.draft_king_points = draft_king_points
+        self.minutes = minutes
+        self.points_per_min = points_per_min
+        self.average_minutes = 0
+        self.average_ppm = 0
+
+
+class LineupReport(object):
+    """The report of how a list of lineups did (or are expected to do) on a date."""
+
+    def __init__(self, lineups, date, days=90):
+        """
+        Args:
+            lineups: list of `EvolvableLineup`
+            date: the date of the games the lineups are for
+            days: the number of days before `date` the averages are calculated over
+        """
+        self.lineups = lineups
+        self.date = date
+        self.days = days
+        self.players = {player for lineup in lineups for player in lineup.genes.values()}
+        self.results = self.load()
+
+    def load(self):
+        """Returns a dictionary of player pk -> `PlayerResult` for every player in the lineups"""
+        results = {player.pk: PlayerResult() for player in self.players}
+        if self.date is None:
+            return results
+
+        for gl in GameLog.objects.filter(player__in=self.players, game__date=self.date):
+            results[gl.player_id] = PlayerResult(gl.draft_king_points, gl.minutes, gl.points_per_min)
+
+        game_logs = GameLog.objects.filter(
+            game__date__gte=self.date - timedelta(days=self.days),
+            game__date__lt=self.date)
+        for pk, (_, avg_minutes, avg_ppm) in Player.averages_for(self.players, game_logs).items():
+            results[pk].average_minutes = avg_minutes
+            results[pk].average_ppm = avg_ppm
+        return results
+
+    def render_lineup(self, i, lineup):
+        """Renders the table of a single lineup, also assigns the lineup's actual points to `lineup.actual`"""
+        ret = 'Lineup {}\n'.format(i + 1)
+        ret += '=' * 100 + '\n'
+
+        lineup_actual_score = 0
+        lineup_actual_mins = 0
+        lineup_avg_mins = 0
+
+        table = Texttable(max_width=130)
+        table.set_deco(Texttable.HEADER)
+        table.add_row(
+            ['Position', 'Starting', 'Name', 'Cost', 'Predicted', 'Actual', 'Mins', 'Avg Mins', 'PPM', 'AVG PPM'])
+
+        for position, player in lineup.genes.items():
+            result = self.results[player.pk]
+            table.add_row([
+                position, str(getattr(player, 'starting', '')), player.name, player.salary,
+                player.expected_points, result.draft_king_points, result.minutes,
+                result.average_minutes, result.points_per_min, result.average_ppm
+            ])
+            lineup_actual_score += result.draft_king_points
+            lineup_actual_mins += result.minutes
+            lineup_avg_mins += result.average_minutes
+
+        lineup.actual = lineup_actual_score
+        table.add_row([
+            'TOTAL', '', '', lineup.cost,
+            lineup.expected_points, lineup_actual_score, lineup_actual_mins,
+            lineup_avg_mins, '', ''
+        ])
+        ret += table.draw() + '\n'
+        ret += '=' * 100 + '\n'
+        ret += ', '.join(p.name for p in lineup.genes.values()) + '\n\n\n'
+        return ret
+
+    def render(self):
+        return ''.join(self.render_lineup(i, lineup) for i, lineup in enumerate(self.lineups))
+
+    def __str__(self):
+        return self.render()
@@ -0,0 +1,202 @@
+"""
+Columnar draftking scoring of game logs.
+
+`GameLog.draft_king_points` scores one game log at a time. The functions in this module score whole
+columns of stats at once with NumPy, exactly like the property does, so the draftking points (and points
+per minute) can be stored on every `GameLog` (`dk_points` and `dk_ppm`) and averaged in SQL.
+
+:func:`~basketball.utils.scoring.score_queryset` scores a whole queryset of game logs without creating
+any model instances, e.g. to scan a season.
+
+The stored columns are tagged with the version of the scoring table they were computed with
+(`dk_scoring_version`, see :func:`~basketball.utils.scoring.scoring_version`), when
+`settings.DRAFT_KING_POINTS` changes :func:`~basketball.utils.scoring.recompute` re-scores the stale rows.
+"""
+import hashlib
+import json
+
+import numpy
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+
+# The `GameLog` columns each scoring category is the sum of
+CATEGORY_COLUMNS = {
+    'free_throws': ('free_throws_made',),
+    'twos': ('twos_made',),
+    'threes': ('threes_made',),
+    'rebounds': ('offensive_rebounds', 'defensive_rebounds'),
+    'assists': ('assists',),
+    'steals': ('steals',),
+    'blocks': ('blocks',),
+    'turnovers': ('turnovers',),
+}
+
+# The categories that count towards double-doubles and triple-doubles, the points always count
+BONUS_CATEGORIES = ('rebounds', 'steals', 'assists', 'blocks')
+
+STAT_COLUMNS = (
+    'minutes', 'offensive_rebounds', 'defensive_rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+    'free_throws_made', 'twos_made', 'threes_made',
+)
+
+# The columns `efficiency_rating()` also needs
+EFFICIENCY_COLUMNS = ('free_throws_attempted', 'field_goals_made', 'field_goals_attempted')
+
+# sqlite can't have more than 999 parameters in a query
+BATCH_SIZE = 900
+
+
+def scoring_version(scoring=None):
+    """A hash of the scoring table, it changes whenever any of the points change.
+
+    Args:
+        scoring: dictionary of category -> points, defaults to `settings.DRAFT_KING_POINTS`
+    """
+    scoring = settings.DRAFT_KING_POINTS if scoring is None else scoring
+    return hashlib.sha1(json.dumps(sorted(scoring.items())).encode('utf-8')).hexdigest()
+
+
+def category(columns, name):
+    """The vector of a scoring category (e.g. 'rebounds'), the sum of its `CATEGORY_COLUMNS`"""
+    return sum(numpy.asarray(columns[c], dtype=numpy.int64) for c in CATEGORY_COLUMNS[name])
+
+
+def real_points(columns):
+    """The points scored in every row, see `GameLog.points`"""
+    return (numpy.asarray(columns['twos_made'], dtype=numpy.int64) * 2 +
+            numpy.asarray(columns['threes_made'], dtype=numpy.int64) * 3 +
+            numpy.asarray(columns['free_throws_made'], dtype=numpy.int64))
+
+
+def bonuses(columns, scoring=None):
+    """Which rows are double-doubles and which are triple-doubles.
+
+    Like `GameLog.draft_king_points`, only the `BONUS_CATEGORIES` that are in the scoring table count,
+    along with the points. A row with 2 of them at 10 or more is a double-double, 3 or more a triple-double.
+
+    Returns:
+        tuple of 2 boolean vectors, (double-doubles, triple-doubles)
+    """
+    scoring = settings.DRAFT_KING_POINTS if scoring is None else scoring
+    stats_over_10 = (real_points(columns) >= 10).astype(numpy.int64)
+    for name in BONUS_CATEGORIES:
+        if name in scoring:
+            stats_over_10 += category(columns, name) >= 10
+    return stats_over_10 == 2, stats_over_10 >= 3
+
+
+def score_columns(columns, scoring=None):
+    """The draftking points of every row of some stat columns, see `GameLog.draft_king_points`.
+
+    Args:
+        columns: dictionary of column name (`STAT_COLUMNS`) -> NumPy vector
+        scoring: dictionary of category -> points, defaults to `settings.DRAFT_KING_POINTS`
+
+    Returns:
+        vector of draftking points
+    """
+    scoring = settings.DRAFT_KING_POINTS if scoring is None else scoring
+    points = numpy.zeros(len(columns['minutes']), dtype=numpy.float64)
+    for name, value in scoring.items():
+        if name in CATEGORY_COLUMNS:
+            points += category(columns, name) * value
+
+    double_double, triple_double = bonuses(columns, scoring)
+    points += numpy.where(triple_double, scoring['triple_double'], 0)
+    points += numpy.where(double_double, scoring['double_double'], 0)
+    return points
+
+
+def efficiency_rating(columns):
+    """The efficiency rating of every row, exactly like `GameLog.efficiency_rating` computes it.
+
+    Note:
+        like the property, the missed free throws and the turnovers are added rather than subtracted
+    """
+    base = (real_points(columns) + category(columns, 'rebounds') + category(columns, 'assists') +
+            category(columns, 'steals') + category(columns, 'blocks'))
+    missed_field_goals = (numpy.asarray(columns['field_goals_attempted'], dtype=numpy.int64) -
+                          numpy.asarray(columns['field_goals_made'], dtype=numpy.int64))
+    missed_free_throws = (numpy.asarray(columns['free_throws_attempted'], dtype=numpy.int64) -
+                          numpy.asarray(columns['free_throws_made'], dtype=numpy.int64))
+    return base - missed_field_goals + missed_free_throws + category(columns, 'turnovers')
+
+
+def points_per_minute(points, minutes):
+    """The draftking points per minute of every row, 0 for the rows without any minutes"""
+    minutes = numpy.asarray(minutes, dtype=numpy.float64)
+    return numpy.divide(points, minutes, out=numpy.zeros(len(points)), where=minutes > 0)
+
+
+def load_columns(queryset, columns=STAT_COLUMNS):
+    """Loads some columns of a queryset into NumPy with a single `values_list()`
+
+    Returns:
+        dictionary of column name -> integer vector, along with 'pk'
+    """
+    columns = ('pk',) + tuple(columns)
+    values = numpy.array(list(queryset.values_list(*columns)), dtype=numpy.int64).reshape(-1, len(columns))
+    return {c: values[:, i] for i, c in enumerate(columns)}
+
+
+def score_queryset(queryset, scoring=None):
+    """Scores every game log of a queryset at once, without creating any model instances.
+
+    The results match the `GameLog` properties exactly.
+
+    Args:
+        queryset: the `GameLog`s to score
+        scoring: dictionary of category -> points, defaults to `settings.DRAFT_KING_POINTS`
+
+    Returns:
+        dictionary of vectors, in the order of the queryset:
+         - the loaded columns (`STAT_COLUMNS`, `EFFICIENCY_COLUMNS` and 'pk')
+         - `draft_king_points` and `points_per_min`
+         - `double_double` and `triple_double` booleans
+         - `efficiency_rating`
+    """
+    columns = load_columns(queryset, STAT_COLUMNS + EFFICIENCY_COLUMNS)
+    columns['draft_king_points'] = score_columns(columns, scoring)
+    columns['points_per_min'] = points_per_minute(columns['draft_king_points'], columns['minutes'])
+    columns['double_double'], columns['triple_double'] = bonuses(columns, scoring)
+    columns['efficiency_rating'] = efficiency_rating(columns)
+    return columns
+
+
+def recompute(queryset, everything=False):
+    """Scores the game logs of `queryset` and stores their `dk_points`, `dk_ppm` and `dk_scoring_version`.
+
+    The stats are loaded with a single `values_list()` and scored with `score_columns()`, the rows are then
+    updated with one UPDATE for each distinct number of points (there are only a few hundred).
+
+    Args:
+        queryset: the `GameLog`s to score
+        everything: re-score every row, by default only the rows scored with another version (or never)
+
+    Returns:
+        the number of game logs that were scored
+    """
+    version = scoring_version()
+    if not everything:
+        queryset = queryset.exclude(dk_scoring_version=version)
+
+    columns = load_columns(queryset)
+    pks = columns['pk']
+    if not len(pks):
+        return 0
+    points = score_columns(columns)
+
+    model = queryset.model
+    with transaction.atomic():
+        for value in numpy.unique(points):
+            scored = pks[points == value].tolist()
+            for start in range(0, len(scored), BATCH_SIZE):
+                model.objects.filter(pk__in=scored[start:start + BATCH_SIZE]).update(
+                    dk_points=float(value),
+                    dk_ppm=Case(
+                        When(minutes__gt=0, then=Value(float(value)) / F('minutes')),
+                        default=0.0,
+                        output_field=FloatField()),
+                    dk_scoring_version=version)
+    return len(pks)
@@ -0,0 +1,154 @@
+"""
+Monte Carlo simulation of how lineups could score.
+
+:class:`~basketball.utils.simulation.OutcomeSimulator` draws correlated draftking point outcomes for a
+pool of players. Every player's spread and the correlations between players (teammates and opponents
+play in the same games) come from their `GameLog` history. Lineups are then scored against every draw
+at once with a single matrix multiplication.
+"""
+import numpy
+
+
+class OutcomeSimulator(object):
+    """Simulates correlated draftking point outcomes for a pool of players."""
+
+    def __init__(self, players, game_logs, n_draws=20000, min_shared_games=5, seed=None):
+        """
+        Args:
+            players: the players to simulate, they must have an `expected_points` attribute
+            game_logs: `GameLog` queryset of the history to learn the spreads and correlations from
+            n_draws: the number of outcomes to simulate
+            min_shared_games: players that played less games together than this are not correlated
+            seed: seed for the random number generator
+        """
+        self.players = list(players)
+        self.ids = {player.pk: i for i, player in enumerate(self.players)}
+        self.n_draws = n_draws
+        self.min_shared_games = min_shared_games
+        self.random = numpy.random.RandomState(seed)
+
+        self.means = numpy.array([p.expected_points for p in self.players], dtype=numpy.float64)
+        self.history, self.played = self.dk_points_history(game_logs)
+        self.stds = self.standard_deviations()
+        self.correlation = self.correlation_matrix()
+        self._outcomes = None
+
+    def dk_points_history(self, game_logs):
+        """Returns 2 (players x games) matrices, the draftking points for each game and whether the player played.
+
+        The stored `dk_points` are loaded with a single `values_list()`, without creating any `GameLog`.
+
+        Raises:
+            ValueError: if some of the game logs haven't been scored, see the `dk_points` command
+        """
+        game_logs = game_logs.filter(player__in=self.players).order_by()
+        rows = [
+            (self.ids[player_id], game_id, points)
+            for player_id, game_id, points in game_logs.values_list('player_id', 'game_id', 'dk_points')]
+        unscored = sum(1 for _, _, points in rows if points is None)
+        if unscored:
+            raise ValueError(
+                '{} game logs have no draftking points, score them with the dk_points command.'.format(unscored))
+        games = {game_id: i for i, game_id in enumerate(sorted({game_id for _, game_id, _ in rows}))}
+
+        history = numpy.zeros((len(self.players), len(games)))
+        played = numpy.zeros((len(self.players), len(games)))
+        for player, game_id, points in rows:
+            history[player, games[game_id]] = points
+            played[player, games[game_id]] = 1
+        return history, played
+
+    def standard_deviations(self):
+        """Every player's standard deviation of draftking points, players without history get the median."""
+        n_games = self.played.sum(axis=1)
+        historical_means = self.history.sum(axis=1) / numpy.maximum(n_games, 1)
+        residuals = (self.history - historical_means[:, None]) * self.played
+        variance = (residuals ** 2).sum(axis=1) / numpy.maximum(n_games - 1, 1)
+
+        stds = numpy.sqrt(variance)
+        known = n_games >= 2
+        stds[~known] = numpy.median(stds[known]) if known.any() else 0
+        return stds
+
+    def correlation_matrix(self):
+        """Correlation of draftking points between every pair of players, from the games they both played in.
+
+        Pairs with less than `min_shared_games` get no correlation, and the matrix is made positive
+        semi-definite so it can be sampled from.
+        """
+        n_games = self.played.sum(axis=1)
+        historical_means = self.history.sum(axis=1) / numpy.maximum(n_games, 1)
+        residuals = (self.history - historical_means[:, None]) * self.played
+
+        shared = self.played.dot(self.played.T)
+        covariance = residuals.dot(residuals.T) / numpy.maximum(shared - 1, 1)
+        scale = numpy.sqrt(numpy.outer(numpy.diag(covariance), numpy.diag(covariance)))
+        correlation = numpy.where(scale > 0, covariance / numpy.where(scale > 0, scale, 1), 0)
+
+        correlation[shared < self.min_shared_games] = 0
+        correlation = numpy.clip(correlation, -1, 1)
+        numpy.fill_diagonal(correlation, 1)
+
+        # Clip the negative eigenvalues and re-normalize the diagonal
+        eigenvalues, eigenvectors = numpy.linalg.eigh(correlation)
+        correlation = (eigenvectors * numpy.maximum(eigenvalues, 1e-6)).dot(eigenvectors.T)
+        d = numpy.sqrt(numpy.diag(correlation))
+        return correlation / numpy.outer(d, d)
+
+    @property
+    def covariance(self):
+        """Covariance matrix of the players' draftking points"""
+        return self.correlation * numpy.outer(self.stds, self.stds)
+
+    @property
+    def outcomes(self):
+        """(draws x players) matrix of simulated draftking points, drawn once and re-used."""
+        if self._outcomes is None:
+            eigenvalues, eigenvectors = numpy.linalg.eigh(self.correlation)
+            transform = eigenvectors * numpy.sqrt(numpy.maximum(eigenvalues, 0))
+            z = self.random.standard_normal((self.n_draws, len(self.players))).dot(transform.T)
+            self._outcomes = numpy.maximum(self.means + z * self.stds, 0)
+        return self._outcomes
+
+    def lineup_matrix(self, lineups):
+        """(lineups x players) matrix with a 1 for every player in the lineup"""
+        matrix = numpy.zeros((len(lineups), len(self.players)))
+        for i, lineup in enumerate(lineups):
+            matrix[i, [self.ids[player.pk] for player in lineup.genes.values()]] = 1
+        return matrix
+
+    def simulate(self, lineups):
+        """(lineups x draws) matrix with the draftking points each lineup scored in each draw"""
+        return self.lineup_matrix(lineups).dot(self.outcomes.T)
+
+    def summarize(self, lineups, pranges=(), percentiles=(10, 50, 90)):
+        """Simulates the lineups and summarizes how they scored.
+
+        Args:
+            lineups: list of `EvolvableLineup`
+            pranges: `PRange`s to calculate the probability of scoring in
+            percentiles: the percentiles of the outcomes to report
+
+        Returns:
+            a dictionary for each lineup with the `mean`, the `percentiles` (as a list)
+            and the `probabilities` of scoring in each of the `pranges` (as a list)
+        """
+        scores = self.simulate(lineups)
+        means = scores.mean(axis=1)
+        percentile_values = numpy.percentile(scores, percentiles, axis=1).T
+
+        probabilities = []
+        for prange in pranges:
+            in_range = scores >= prange.d1
+            if prange.d2:
+                in_range &= scores < prange.d2
+            probabilities.append(in_range.mean(axis=1))
+        probabilities = numpy.array(probabilities).T if pranges else numpy.zeros((len(lineups), 0))
+
+        return [
+            {
+                'mean': float(means[i]),
+                'percentiles': percentile_values[i].tolist(),
+                'probabilities': probabilities[i].tolist(),
+            }
+            for i in range(len(lineups))]
@@ -0,0 +1,541 @@
+"""
+Vectorized alternative to the genetic algorithm in :mod:`~basketball.utils.evolution`.
+
+Instead of breeding a handful of :class:`~basketball.utils.evolution.EvolvableLineup` objects
+per generation, the population is a NumPy integer matrix of player ids (one row per lineup, one column
+per roster slot). Crossover, mutation, the salary cap check and fitness are done for a whole
+generation at once.
+
+It contains 3 classes:
+
+ 1. :class:`~basketball.utils.vector_evolution.ArrayGA` the NumPy engine, it knows nothing about players.
+ 2. :class:`~basketball.utils.vector_evolution.VectorEvolve` a drop in replacement for
+    :class:`~basketball.utils.evolution.Evolve`.
+ 3. :class:`~basketball.utils.vector_evolution.IslandEvolve` evolves several `VectorEvolve` populations
+    on separate processes.
+
+"""
+import math
+import multiprocessing
+import time
+from collections import defaultdict
+
+import numpy
+
+from basketball.constants import SALARY_CAP
+from basketball.utils.evolution import Evolve, StopCriteria
+
+
+class ArrayGA(object):
+    """Genetic algorithm over a population matrix of player ids."""
+
+    def __init__(self, salaries, points, slot_candidates, salary_cap=SALARY_CAP,
+                 n_parents=64, mutation_rate=0.5, seed=None):
+        """
+        Args:
+            salaries: vector of player salaries indexed by player id
+            points: vector of player expected points indexed by player id
+            slot_candidates: list with an array of eligible player ids for each slot (column)
+            salary_cap: lineups that cost more than this cannot survive
+            n_parents: how many of the fittest lineups are bred to create the next generation
+            mutation_rate: probability that a child has one of its slots replaced from the pool
+            seed: seed for the random number generator
+        """
+        self.salaries = salaries
+        self.points = points
+        self.slot_candidates = slot_candidates
+        self.salary_cap = salary_cap
+        self.n_parents = n_parents
+        self.mutation_rate = mutation_rate
+        self.random = numpy.random.RandomState(seed)
+        self.avoided = None
+        self.max_shared = None
+        self.scorer = None
+        self.evaluations = 0
+        self.rejected = 0
+        self.mutations = 0
+        self.timings = defaultdict(float)
+        # Random 64 bit value for each player, the sum over a lineup identifies it regardless of the slots.
+        self.keys = self.random.randint(
+            numpy.iinfo(numpy.int64).min, numpy.iinfo(numpy.int64).max, size=len(salaries), dtype=numpy.int64)
+
+    @property
+    def n_slots(self):
+        return len(self.slot_candidates)
+
+    def random_rows(self, size):
+        """Returns a `size` x `n_slots` matrix of random lineups (they may not be able to survive)."""
+        rows = numpy.empty((size, self.n_slots), dtype=numpy.int64)
+        for column, candidates in enumerate(self.slot_candidates):
+            rows[:, column] = candidates[self.random.randint(len(candidates), size=size)]
+        return rows
+
+    def random_population(self, size, max_attempts=100):
+        """Returns a matrix of `size` random lineups that can all survive."""
+        population = numpy.empty((0, self.n_slots), dtype=numpy.int64)
+        for _ in range(max_attempts):
+            rows = self.random_rows(size * 2)
+            population = numpy.vstack((population, rows[self.can_survive(rows)]))
+            if len(population) >= size:
+                return population[:size]
+        raise ValueError('Unable to generate lineups that are under the salary cap.')
+
+    def can_survive(self, rows):
+        """Boolean vector, whether each lineup is under the cap and has no duplicate players."""
+        ordered = numpy.sort(rows, axis=1)
+        duplicates = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+        return ~duplicates & (self.salaries[rows].sum(axis=1) <= self.salary_cap)
+
+    def fitness_level(self, rows):
+        """Expected points of each lineup (or the `scorer`'s `score_rows()`), lineups that cannot survive
+        or are too close to an avoided lineup get `-inf`."""
+        self.evaluations += len(rows)
+        if self.scorer is None:
+            fitness = self.points[rows].sum(axis=1)
+        else:
+            fitness = self.scorer.score_rows(rows)
+        fitness[~self.can_survive(rows)] = -numpy.inf
+        if self.avoided is not None:
+            shared = self.avoided[:, rows].sum(axis=2)
+            fitness[(shared > self.max_shared).any(axis=0)] = -numpy.inf
+        return fitness
+
+    def avoid(self, rows, min_distance=1):
+        """Gives lineups that don't have at least `min_distance` players that aren't in each of `rows` a fitness
+        of `-inf`."""
+        self.avoided = numpy.zeros((len(rows), len(self.salaries)), dtype=numpy.int64)
+        for i, row in enumerate(rows):
+            self.avoided[i, row] = 1
+        self.max_shared = self.n_slots - min_distance
+
+    def cross_over(self, parents, size):
+        """Creates `size` children, each slot is inherited from one of 2 randomly selected parents."""
+        mothers = parents[self.random.randint(len(parents), size=size)]
+        fathers = parents[self.random.randint(len(parents), size=size)]
+        from_father = self.random.rand(size, self.n_slots) < 0.5
+        return numpy.where(from_father, fathers, mothers)
+
+    def mutate(self, rows):
+        """Replaces a random slot of roughly `mutation_rate` of the rows with a random player (in place)."""
+        mutated = numpy.flatnonzero(self.random.rand(len(rows)) < self.mutation_rate)
+        self.mutations += len(mutated)
+        columns = self.random.randint(self.n_slots, size=len(mutated))
+        for column, candidates in enumerate(self.slot_candidates):
+            rows_for_column = mutated[columns == column]
+            rows[rows_for_column, column] = candidates[
+                self.random.randint(len(candidates), size=len(rows_for_column))]
+        return rows
+
+    def unique(self, rows):
+        """Vector of hashables that identify each lineup, regardless of which slots the players are in."""
+        return self.keys[rows].sum(axis=1)
+
+    def select(self, rows, fitness, size):
+        """Returns the `size` fittest unique lineups that can survive (and their fitness), fittest first.
+
+        Two rows are the same lineup if they contain the same players, regardless of the slots.
+        """
+        alive = numpy.isfinite(fitness)
+        rows, fitness = rows[alive], fitness[alive]
+        _, unique = numpy.unique(self.unique(rows), return_index=True)
+        rows, fitness = rows[unique], fitness[unique]
+        order = numpy.argsort(-fitness, kind='mergesort')[:size]
+        return rows[order], fitness[order]
+
+    def exclude(self, player_ids):
+        """Stops breeding lineups with some players.
+
+        Args:
+            player_ids: ids of the players that can no longer be used
+        """
+        self.slot_candidates = [
+            candidates[~numpy.isin(candidates, player_ids)] for candidates in self.slot_candidates]
+
+    def without(self, player_ids, population, fitness):
+        """Removes the lineups that have any of `player_ids` and tops the population back up with random lineups.
+
+        Returns:
+            the new population and its fitness
+        """
+        keep = ~numpy.isin(population, player_ids).any(axis=1)
+        return self.refill(population[keep], fitness[keep], len(population))
+
+    def rescore(self, population):
+        """Re-calculates the fitness of a population (e.g. after `avoid()`), replacing the lineups that can no
+        longer survive with random lineups.
+
+        Returns:
+            the new population and its fitness
+        """
+        size = len(population)
+        population, fitness = self.select(population, self.fitness_level(population), size)
+        return self.refill(population, fitness, size)
+
+    def refill(self, population, fitness, size):
+        """Tops `population` back up to `size` lineups with random lineups.
+
+        Returns:
+            the new population and its fitness
+        """
+        if len(population) < size:
+            rows = self.random_population(size - len(population))
+            population, fitness = self.select(
+                numpy.vstack((population, rows)),
+                numpy.concatenate((fitness, self.fitness_level(rows))),
+                size)
+        return population, fitness
+
+    def merge(self, rows, population, fitness, size):
+        """Adds `rows` to a population (random if it's empty) and keeps the `size` fittest.
+
+        Returns:
+            the new population and its fitness
+        """
+        if population is None or not len(population):
+            population = self.random_population(size)
+            fitness = self.fitness_level(population)
+        return self.select(
+            numpy.vstack((rows, population)),
+            numpy.concatenate((self.fitness_level(rows), fitness)),
+            size)
+
+    def generation(self, population, fitness, n_children):
+        """Breeds the fittest of `population` and returns the next population and its fitness.
+
+        The next population is the fittest of the current population and the children,
+        so the best lineups are never lost.
+        """
+        started = time.time()
+        children = self.cross_over(population[:self.n_parents], n_children)
+        crossed = time.time()
+        children = self.mutate(children)
+        mutated = time.time()
+        children_fitness = self.fitness_level(children)
+        evaluated = time.time()
+        self.rejected += int(numpy.isinf(children_fitness).sum())
+
+        population, fitness = self.select(
+            numpy.vstack((population, children)),
+            numpy.concatenate((fitness, children_fitness)),
+            len(population))
+
+        self.timings['cross_over'] += crossed - started
+        self.timings['mutate'] += mutated - crossed
+        self.timings['fitness_level'] += evaluated - mutated
+        self.timings['select'] += time.time() - evaluated
+        return population, fitness
+
+
+class VectorEvolve(Evolve):
+    """:class:`~basketball.utils.evolution.Evolve` that breeds whole generations with NumPy.
+
+    `run()` and `best` behave the same as they do for `Evolve`, `best` being a list of
+    :class:`~basketball.utils.evolution.EvolvableLineup`.
+    """
+
+    def __init__(self, gene_pool, population_size=2048, seed=None):
+        """
+        Args:
+            gene_pool: A dictionary with "genes" for keys, and a list of "gene_expressions" as the value.
+            population_size: number of lineups in each generation.
+            seed: seed for the random number generator
+        """
+        super(VectorEvolve, self).__init__(gene_pool, seed=seed)
+        self.population_size = population_size
+        self.engine = ArrayGA(
+            self.pool.salaries, self.pool.points, self.pool.slot_candidates,
+            n_parents=max(2, population_size // 8), seed=seed)
+        self.fitness = None
+
+    def run(self, n=1000, n_best=5, n_children=4, stop=None):
+        """Starts and runs the evolution process.
+
+        To keep the arguments comparable with `Evolve.run()` the same number of lineups are bred
+        (`n` * `n_children`), but `population_size` of them are bred every generation.
+
+        Args:
+            n: the number of `Evolve` generations worth of children to breed
+            n_best: the number of lineups to keep in `self.best`
+            n_children: the number of children `Evolve` would breed each generation
+            stop: optional :class:`~basketball.utils.evolution.StopCriteria`, checked after every generation
+
+        Returns:
+            The reason the evolution stopped (also assigned to `self.stop_reason`)
+        """
+        generations = int(math.ceil(n * n_children / float(self.population_size)))
+
+        if not len(self.population):
+            self.population = self.engine.random_population(self.population_size)
+            self.population, self.fitness = self.engine.select(
+                self.population, self.engine.fitness_level(self.population), self.population_size)
+
+        if stop is not None:
+            stop.start()
+        self.stop_reason = StopCriteria.COMPLETED
+        self.start_metrics()
+
+        bar = self.progress_bar(generations)
+
+        for i in range(generations):
+            self.population, self.fitness = self.engine.generation(
+                self.population, self.fitness, self.population_size)
+            self.update_progress(bar, i + 1, float(self.fitness.max()))
+
+            if self.callbacks:
+                self.evaluations = self.engine.evaluations
+                self.emit_metrics(i + 1, float(self.fitness[0]), float(self.fitness.mean()))
+
+            if stop is not None:
+                reason = stop.check(self.fitness[:n_best])
+                if reason:
+                    self.stop_reason = reason
+                    break
+
+        self.evaluations = self.engine.evaluations
+        self.best = [self.new_lineup(self.pool.genes(row)) for row in self.population[:n_best]]
+        return self.stop_reason
+
+    def counters(self):
+        """The running totals of the NumPy engine, see `Evolve.counters()`"""
+        return {
+            'evaluations': self.engine.evaluations,
+            'rejected': self.engine.rejected,
+            'mutations': self.engine.mutations,
+            'timings': dict(self.engine.timings),
+        }
+
+    def exclude(self, expressions):
+        """Removes players from the gene pool and drops every lineup that has one of them.
+
+        Args:
+            expressions: iterable of players that can no longer be used
+        """
+        expressions = set(expressions)
+        player_ids = [self.pool.ids[p] for p in expressions if p in self.pool.ids]
+        self.engine.exclude(player_ids)
+        self.pool.exclude(expressions)
+        self.bound = None
+        if len(self.population):
+            self.population, self.fitness = self.engine.without(player_ids, self.population, self.fitness)
+        self.best = [b for b in self.best if not any(p in b for p in expressions)]
+
+    def avoid(self, evolvables, min_distance=1):
+        """Keeps the population away from some lineups (e.g. lineups that have already been picked).
+
+        Args:
+            evolvables: the `EvolvableLineup`s to avoid
+            min_distance: the minimum number of players a lineup must not share with each of them
+        """
+        super(VectorEvolve, self).avoid(evolvables, min_distance=min_distance)
+        self.engine.avoid([self.pool.row(e.genes) for e in self.avoided], min_distance)
+        if len(self.population):
+            self.population, self.fitness = self.engine.rescore(self.population)
+
+    def set_scorer(self, scorer):
+        """Changes the fitness level of the lineups, the scorer also needs a `score_rows(rows)` method"""
+        super(VectorEvolve, self).set_scorer(scorer)
+        self.engine.scorer = scorer
+        if len(self.population):
+            self.population, self.fitness = self.engine.rescore(self.population)
+
+    def warm_start(self, lineups):
+        """Adds lineups (e.g. the best of a previous run) to the population so `run()` continues from them.
+
+        Args:
+            lineups: iterable of dictionaries of slot -> player, they are repaired with `repair()` first
+
+        Returns:
+            the `EvolvableLineup`s that were added, lineups that could not be repaired are left out
+        """
+        seeded = [e for e in (self.repair(genes) for genes in lineups) if e is not None]
+        if seeded:
+            rows = numpy.array([self.pool.row(e.genes) for e in seeded])
+            self.population, self.fitness = self.engine.merge(rows, self.population, self.fitness, self.population_size)
+        return seeded
+
+
+def evolve_island(args):
+    """Runs several generations of a single island, see :class:`~basketball.utils.vector_evolution.IslandEvolve`
+
+    Args:
+        args: tuple of (`ArrayGA`, population, fitness, number of generations)
+
+    Returns:
+        tuple of (`ArrayGA`, population, fitness), the engine is returned so its random state carries over.
+    """
+    engine, population, fitness, generations = args
+    for _ in range(generations):
+        population, fitness = engine.generation(population, fitness, len(population))
+    return engine, population, fitness
+
+
+class IslandEvolve(VectorEvolve):
+    """:class:`~basketball.utils.vector_evolution.VectorEvolve` that evolves several populations in parallel.
+
+    Each "island" is an independent population with its own random seed, evolved in its own process.
+    Every `migration_interval` generations the fittest lineups of each island migrate to the next island.
+    """
+
+    PATIENCE_UNIT = 'migration rounds'
+
+    def __init__(self, gene_pool, n_islands=None, migration_interval=50, n_migrants=16,
+                 population_size=2048, seed=None):
+        """
+        Args:
+            gene_pool: A dictionary with "genes" for keys, and a list of "gene_expressions" as the value.
+            n_islands: number of populations (and processes), defaults to the number of cpus.
+            migration_interval: number of generations between migrations
+            n_migrants: number of lineups that migrate from each island
+            population_size: number of lineups in each island's generation.
+            seed: seed for the random number generators, each island uses `seed + i`
+        """
+        super(IslandEvolve, self).__init__(gene_pool, population_size=population_size, seed=seed)
+        self.n_islands = n_islands or multiprocessing.cpu_count()
+        self.migration_interval = migration_interval
+        self.n_migrants = n_migrants
+        self.islands = [
+            ArrayGA(
+                self.pool.salaries, self.pool.points, self.pool.slot_candidates,
+                n_parents=self.engine.n_parents, seed=None if seed is None else seed + i + 1)
+            for i in range(self.n_islands)]
+        self.island_populations = []
+
+    def run(self, n=1000, n_best=5, n_children=4, stop=None):
+        """Starts and runs the evolution process on every island.
+
+        Each island breeds as many generations as `VectorEvolve.run()` would.
+
+        Args:
+            n: the number of `Evolve` generations worth of children to breed on each island
+            n_best: the number of lineups to keep in `self.best`
+            n_children: the number of children `Evolve` would breed each generation
+            stop: optional :class:`~basketball.utils.evolution.StopCriteria`, checked after every migration
+                (`patience` is counted in migrations)
+
+        Returns:
+            The reason the evolution stopped (also assigned to `self.stop_reason`)
+        """
+        generations = int(math.ceil(n * n_children / float(self.population_size)))
+
+        if not self.island_populations:
+            for engine in self.islands:
+                population = engine.random_population(self.population_size)
+                self.island_populations.append(engine.select(
+                    population, engine.fitness_level(population), self.population_size))
+
+        if stop is not None:
+            stop.start()
+        self.stop_reason = StopCriteria.COMPLETED
+        self.start_metrics()
+
+        epochs = int(math.ceil(generations / float(self.migration_interval)))
+        bar = self.progress_bar(epochs)
+        pool = multiprocessing.Pool(self.n_islands)
+
+        try:
+            for i in range(epochs):
+                epoch_generations = min(self.migration_interval, generations - i * self.migration_interval)
+                results = pool.map(evolve_island, [
+                    (engine, population, fitness, epoch_generations)
+                    for engine, (population, fitness) in zip(self.islands, self.island_populations)])
+                self.islands = [engine for engine, _, _ in results]
+                self.island_populations = self.migrate([(p, f) for _, p, f in results])
+                self.update_progress(bar, i + 1, float(max(f.max() for _, f in self.island_populations)))
+
+                if self.callbacks:
+                    self.evaluations = self.counters()['evaluations']
+                    self.emit_metrics(
+                        min(generations, (i + 1) * self.migration_interval),
+                        float(max(f[0] for _, f in self.island_populations)),
+                        float(numpy.mean([f.mean() for _, f in self.island_populations])))
+
+                if stop is not None:
+                    reason = stop.check(sorted(
+                        numpy.concatenate([f[:n_best] for _, f in self.island_populations]),
+                        reverse=True)[:n_best])
+                    if reason:
+                        self.stop_reason = reason
+                        break
+        finally:
+            pool.close()
+            pool.join()
+
+        self.population, self.fitness = self.engine.select(
+            numpy.vstack([p for p, _ in self.island_populations]),
+            numpy.concatenate([f for _, f in self.island_populations]),
+            self.population_size)
+        self.evaluations = self.counters()['evaluations']
+        self.best = [self.new_lineup(self.pool.genes(row)) for row in self.population[:n_best]]
+        return self.stop_reason
+
+    def counters(self):
+        """The running totals of every island (and the engine used outside of the islands)"""
+        timings = defaultdict(float)
+        for engine in [self.engine] + self.islands:
+            for operator, seconds in engine.timings.items():
+                timings[operator] += seconds
+        return {
+            'evaluations': sum(engine.evaluations for engine in [self.engine] + self.islands),
+            'rejected': sum(engine.rejected for engine in [self.engine] + self.islands),
+            'mutations': sum(engine.mutations for engine in [self.engine] + self.islands),
+            'timings': dict(timings),
+        }
+
+    def exclude(self, expressions):
+        """Removes players from the gene pool of every island and drops every lineup that has one of them."""
+        expressions = set(expressions)
+        super(IslandEvolve, self).exclude(expressions)
+        player_ids = [self.pool.ids[p] for p in expressions if p in self.pool.ids]
+        for engine in self.islands:
+            engine.exclude(player_ids)
+        self.island_populations = [
+            engine.without(player_ids, population, fitness)
+            for engine, (population, fitness) in zip(self.islands, self.island_populations)]
+
+    def avoid(self, evolvables, min_distance=1):
+        """Keeps every island's population away from some lineups."""
+        super(IslandEvolve, self).avoid(evolvables, min_distance=min_distance)
+        for engine in self.islands:
+            engine.avoid([self.pool.row(e.genes) for e in self.avoided], min_distance)
+        self.island_populations = [
+            engine.rescore(population) for engine, (population, _) in zip(self.islands, self.island_populations)]
+
+    def set_scorer(self, scorer):
+        """Changes the fitness level of the lineups on every island"""
+        super(IslandEvolve, self).set_scorer(scorer)
+        for engine in self.islands:
+            engine.scorer = scorer
+        self.island_populations = [
+            engine.rescore(population) for engine, (population, _) in zip(self.islands, self.island_populations)]
+
+    def warm_start(self, lineups):
+        """Adds the repaired lineups to every island's population, see `VectorEvolve.warm_start()`"""
+        seeded = super(IslandEvolve, self).warm_start(lineups)
+        if seeded:
+            rows = numpy.array([self.pool.row(e.genes) for e in seeded])
+            populations = self.island_populations or [(None, None)] * len(self.islands)
+            self.island_populations = [
+                engine.merge(rows, population, fitness, self.population_size)
+                for engine, (population, fitness) in zip(self.islands, populations)]
+        return seeded
+
+    def migrate(self, island_populations):
+        """Moves the fittest lineups of every island to the next island (in a ring).
+
+        The migrants replace the least fit lineups of the island they move to.
+
+        Args:
+            island_populations: list of (population, fitness) for each island
+
+        Returns:
+            list of (population, fitness) for each island after the migration
+        """
+        migrated = []
+        for i, engine in enumerate(self.islands):
+            population, fitness = island_populations[i]
+            migrants, migrant_fitness = island_populations[i - 1]
+            migrated.append(engine.select(
+                numpy.vstack((migrants[:self.n_migrants], population)),
+                numpy.concatenate((migrant_fitness[:self.n_migrants], fitness)),
+                len(population)))
+        return migrated
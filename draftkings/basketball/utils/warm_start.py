@@ -0,0 +1,50 @@
+"""
+Saves and restores the best lineups of a run so late news can be handled without starting over.
+
+When the starters or injuries change near lock, :func:`~basketball.utils.warm_start.load_lineups` reads the
+lineups of the previous run back in, matched by player name to the players of the new gene pool. Players that
+are no longer in the pool come back as `None`, :meth:`~basketball.utils.evolution.Evolve.warm_start` repairs those
+slots and the optimizer continues evolving from the repaired lineups.
+"""
+import simplejson as json
+
+
+def save_lineups(path, lineups, date=None):
+    """Writes lineups to a JSON file.
+
+    Args:
+        path: the file to write
+        lineups: iterable of `EvolvableLineup`
+        date: the date of the slate the lineups are for
+    """
+    state = {
+        'date': str(date) if date is not None else None,
+        'lineups': [
+            {slot: player.name for slot, player in lineup.genes.items()}
+            for lineup in lineups],
+    }
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def load_lineups(path, gene_pool):
+    """Reads lineups written by `save_lineups()` back in.
+
+    Args:
+        path: the file to read
+        gene_pool: A dictionary with roster slots for keys, and a list of eligible players as the value.
+
+    Returns:
+        a list of dictionaries of slot -> player, the slots whose player isn't in `gene_pool` are `None`
+    """
+    with open(path) as f:
+        state = json.load(f)
+
+    players = {}
+    for slot, candidates in gene_pool.items():
+        for player in candidates:
+            players[(slot, player.name)] = player
+
+    return [
+        {slot: players.get((slot, name)) for slot, name in lineup.items() if slot in gene_pool}
+        for lineup in state['lineups']]
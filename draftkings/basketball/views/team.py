@@ -76,8 +76,9 @@ class TeamDetail(DetailView):
 
     def get_players(self, game_logs):
         players = set()
-        for gl in game_logs:
-            players.add(gl.player)
+        for game_log in game_logs:
+            for gl in game_log:
+                players.add(gl.player)
         return list(players)
 
     def get_context_data(self, **kwargs):
@@ -95,12 +96,13 @@ class TeamDetail(DetailView):
             context['season'] = season
 
         context['filters'] = page_filters
-        context['data'] = json.dumps(self.get_graph_data(team.game_logs_grouped_by_game(game_logs=game_logs)))
+        grouped_game_logs = team.game_logs_grouped_by_game(game_logs=game_logs)
+        context['data'] = json.dumps(self.get_graph_data(grouped_game_logs))
         context['average_points'] = round(team.average_points(game_logs=game_logs), 2)
         context['average_playtime'] = round(team.average_playtime(game_logs=game_logs), 2)
         if context['average_playtime']:
             context['average_pts_per_min'] = round(context['average_points'] / context['average_playtime'], 2)
         else:
             context['average_pts_per_min'] = 0
-        context['players'] = self.get_players(game_logs)
+        context['players'] = self.get_players(grouped_game_logs)
         return context